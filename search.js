@@ -0,0 +1,109 @@
+// Client-side search over the static index written by `python manager.py build`.
+// Loads search/meta.json on first focus and only the term shards a query needs.
+(function () {
+    const root = new URL('.', document.currentScript.src);
+    const input = document.getElementById('search-input');
+    const results = document.getElementById('search-results');
+    if (!input || !results) return;
+
+    let meta = null;
+    const shards = {};
+
+    function loadJSON(path) {
+        return fetch(new URL(path, root)).then(r => r.ok ? r.json() : {});
+    }
+
+    function loadMeta() {
+        if (!meta) meta = loadJSON('search/meta.json');
+        return meta;
+    }
+
+    function loadShard(term) {
+        const key = /[a-z]/.test(term[0]) ? term[0] : '0';
+        if (!shards[key]) shards[key] = loadMeta().then(m => m.shards.includes(key) ? loadJSON(`search/${key}.json`) : {});
+        return shards[key];
+    }
+
+    function tokenize(text) {
+        return (text.toLowerCase().match(/[a-z0-9][a-z0-9'+#.-]*[a-z0-9+#]|[a-z0-9]/g) || [])
+            .filter(t => t.length > 1);
+    }
+
+    // BM25 over raw term frequencies; document lengths come from meta.json
+    const K1 = 1.2, B = 0.75;
+
+    // Every query term must match; the last one also matches as a prefix (search-as-you-type)
+    async function search(query) {
+        const terms = tokenize(query);
+        if (!terms.length) return [];
+        const m = await loadMeta();
+        const total = m.docs.length;
+        const avgLength = m.docs.reduce((sum, d) => sum + d[4], 0) / total;
+        let scores = null;
+        for (const [i, term] of terms.entries()) {
+            const shard = await loadShard(term);
+            const termScores = new Map();
+            for (const [t, postings] of Object.entries(shard)) {
+                if (t !== term && !(i === terms.length - 1 && t.startsWith(term))) continue;
+                const idf = Math.log(1 + (total - postings.length + 0.5) / (postings.length + 0.5));
+                for (const [doc, tf] of postings) {
+                    const norm = K1 * (1 - B + B * m.docs[doc][4] / avgLength);
+                    termScores.set(doc, (termScores.get(doc) || 0) + idf * tf * (K1 + 1) / (tf + norm));
+                }
+            }
+            if (scores === null) {
+                scores = termScores;
+            } else {
+                for (const doc of [...scores.keys()]) {
+                    if (termScores.has(doc)) scores.set(doc, scores.get(doc) + termScores.get(doc));
+                    else scores.delete(doc);
+                }
+            }
+        }
+        return [...scores.entries()].sort((a, b) => b[1] - a[1]).slice(0, 10).map(([doc]) => m.docs[doc]);
+    }
+
+    function render(docs, query) {
+        results.replaceChildren();
+        if (!query.trim()) {
+            results.classList.add('hidden');
+            return;
+        }
+        if (!docs.length) {
+            const li = document.createElement('li');
+            li.className = 'px-4 py-2 text-sm font-mono text-muted-foreground';
+            li.textContent = 'No matches';
+            results.appendChild(li);
+        }
+        for (const [, title, date, url] of docs) {
+            const li = document.createElement('li');
+            const a = document.createElement('a');
+            a.href = new URL(url, root).href;
+            a.className = 'flex justify-between gap-4 px-4 py-2 text-sm font-mono hover:bg-muted hover:text-accent transition-colors';
+            a.textContent = title;
+            const span = document.createElement('span');
+            span.className = 'text-xs text-muted-foreground whitespace-nowrap';
+            span.textContent = date;
+            a.appendChild(span);
+            li.appendChild(a);
+            results.appendChild(li);
+        }
+        results.classList.remove('hidden');
+    }
+
+    let timer = null;
+    input.addEventListener('focus', loadMeta, { once: true });
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const query = input.value;
+            search(query).then(docs => { if (input.value === query) render(docs, query); });
+        }, 120);
+    });
+    input.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            input.value = '';
+            render([], '');
+        }
+    });
+})();
@@ -0,0 +1,4585 @@
+"""
+WF-AI Site Manager implementation: posts, build, feeds, server and bd integration.
+
+manager.py is the command-line entry point (see it for usage); the code lives
+in this importable module so Python caches its bytecode in __pycache__.
+"""
+
+import time
+_STARTED = time.perf_counter()
+
+import sys
+import os
+import re
+import json
+import hashlib
+import datetime
+import functools
+import importlib
+import contextlib
+import threading
+from importlib.util import find_spec
+from html import escape, unescape
+from pathlib import Path
+
+# Configuration
+SITE_URL = "https://w4ester.github.io/wf-ai-site"
+SITE_TITLE = "WF-AI Site"
+SITE_DESCRIPTION = "A digital garden for AI experiments, projects, and ideas from the Baltimore AI Producers Lab."
+AUTHOR = "w4ester"
+
+# Heavy modules (markdown, Pillow, asyncio, http.server, ...) are imported on
+# first use through lazy_import, so commands like `list` or `ready` never pay
+# for them. Optional dependencies are only looked up here, not imported.
+
+# markdown is optional: without it posts are plain text
+HAS_MARKDOWN = find_spec("markdown") is not None
+
+# Pillow is optional too: without it images are not resized, only lazy-loaded
+HAS_PIL = find_spec("PIL") is not None
+
+# zstandard is optional: without it `build --out` writes .gz siblings only
+HAS_ZSTD = find_spec("zstandard") is not None
+
+# Pygments is optional: without it fenced code blocks are left unhighlighted
+HAS_PYGMENTS = find_spec("pygments") is not None
+
+# NumPy is optional: without it post pages get no related-posts links
+HAS_NUMPY = find_spec("numpy") is not None
+
+# fontTools is optional: without it vendored fonts are served whole, not subset
+# (brotli adds WOFF2 output; without it subsets are WOFF)
+HAS_FONTTOOLS = find_spec("fontTools") is not None
+HAS_BROTLI = find_spec("brotli") is not None
+
+# Time spent in lazy imports, for --profile-startup
+IMPORT_TIMINGS = {}
+
+
+def lazy_import(name: str):
+    """Import a module on first use and record how long that took."""
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMINGS[name] = time.perf_counter() - start
+        record_span(f"import {name}", start, IMPORT_TIMINGS[name])
+    return module
+
+
+# File locking: fcntl on POSIX, msvcrt on Windows
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    import msvcrt
+    HAS_FCNTL = False
+
+# HTML Template for posts (with collapsible content)
+POST_TEMPLATE = """
+<article id="{slug}" class="group rounded-lg border border-border bg-card text-card-foreground shadow-sm transition-all hover:shadow-lg hover:border-accent/50 animate-slide-up" style="animation-delay: 0.1s; opacity: 0;" data-date="{iso_date}">
+    <div class="flex flex-col space-y-1.5 p-6">
+        <div class="flex justify-between items-start gap-4">
+            <h3 class="font-semibold leading-none tracking-tight text-lg font-mono group-hover:text-accent transition-colors"><a href="post/{slug}/">{title}</a></h3>
+            <span class="text-xs text-muted-foreground font-mono whitespace-nowrap">{date_display}</span>
+        </div>
+    </div>
+    <div class="p-6 pt-0 text-muted-foreground prose post-content">
+        {content}
+        <div class="post-fade"></div>
+    </div>{read_more}
+    {tags_html}
+</article>
+"""
+
+# Listings show the excerpt; this links to the permalink page, and the layout's
+# togglePost() fetches post/<slug>/body.html in place instead when it can
+READ_MORE_TEMPLATE = """
+    <div class="px-6 pb-2">
+        <a class="read-more-btn" href="post/{slug}/" data-v="{version}" onclick="togglePost(this); return false;">
+            <span>Continue reading ({words} words · {minutes} min)</span>
+            <svg xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24" stroke-width="2" stroke="currentColor"><path stroke-linecap="round" stroke-linejoin="round" d="M19 9l-7 7-7-7" /></svg>
+        </a>
+    </div>"""
+
+TAGS_TEMPLATE = """<div class="px-6 pb-4 flex gap-2 flex-wrap">
+{tags}
+</div>"""
+
+TAG_TEMPLATE = '<a href="tags/{slug}/" class="text-xs font-mono px-2 py-1 rounded bg-muted text-muted-foreground hover:text-accent transition-colors">#{tag}</a>'
+
+# Listing pages: bounded front page, numbered archive pages, one listing per tag
+POSTS_PER_PAGE = 10
+
+PAGE_HEADING_TEMPLATE = """<div class="flex items-baseline justify-between gap-4">
+    <h2 class="text-xl font-semibold font-mono">{heading}</h2>
+    <span class="text-xs text-muted-foreground font-mono">{note}</span>
+</div>
+"""
+
+PAGINATION_TEMPLATE = """<nav class="flex justify-between items-center pt-6 text-sm font-mono" aria-label="Archive pages">
+    <span>{newer}</span>
+    <span class="text-muted-foreground">{page}</span>
+    <span>{older}</span>
+</nav>
+"""
+
+PAGE_LINK_TEMPLATE = '<a href="{href}" class="hover:text-accent transition-colors">{label}</a>'
+
+# Related posts, below the article on its permalink page
+RELATED_TEMPLATE = """<aside class="pt-6" aria-label="Related posts">
+    <h4 class="text-sm font-mono text-muted-foreground mb-2">related</h4>
+    <ul class="space-y-1 text-sm font-mono">
+{links}
+    </ul>
+</aside>
+"""
+
+RELATED_LINK_TEMPLATE = """        <li><a href="post/{slug}/" class="hover:text-accent transition-colors">{title}</a> \
+<span class="text-muted-foreground">{date}</span></li>"""
+
+POST_PAGE_FOOTER_TEMPLATE = """<nav class="pt-6 text-sm font-mono" aria-label="Site">
+    <a href="./" class="hover:text-accent transition-colors">← All posts</a>
+</nav>
+"""
+
+# Opening <main> tag in index.html; generated posts live right after it
+MAIN_MARKER = '<main id="main-content" class="space-y-6" role="main" aria-label="Blog posts">'
+
+
+def print_banner():
+    """Print a nice CLI banner."""
+    print("\n╔═══════════════════════════════════════╗")
+    print("║         WF-AI Site Manager            ║")
+    print("╚═══════════════════════════════════════╝\n")
+
+
+# =============================================================================
+# Tracing
+# =============================================================================
+#
+# Opt-in spans across the publish pipeline, enabled with --trace FILE or the
+# WF_TRACE=FILE environment variable. A .json file gets Chrome trace format
+# (open it in chrome://tracing or ui.perfetto.dev); any other name gets one
+# JSON object per line. With tracing off, span() returns a shared no-op, so
+# instrumented code pays a single function call.
+
+TRACE_ENV = "WF_TRACE"
+
+_trace_events = None  # finished spans while tracing is on
+
+
+class Span:
+    """A timed region of the pipeline; set() attaches details like byte counts."""
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        record_span(self.name, self.start, time.perf_counter() - self.start, **self.args)
+        return False
+
+
+class _NoSpan:
+    """Stand-in for Span when tracing is off."""
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **args) -> Span | _NoSpan:
+    """Time a region when tracing is on: `with span('stage', bytes=n) as s: ...`."""
+    if _trace_events is None:
+        return _NO_SPAN
+    return Span(name, args)
+
+
+def record_span(name: str, start: float, duration: float, **args):
+    """Record an already-measured span (start is a perf_counter value)."""
+    if _trace_events is not None:
+        _trace_events.append([name, start, duration, os.getpid(), threading.get_ident(), args])
+
+
+def start_tracing():
+    """Begin collecting spans in this process."""
+    global _trace_events
+    _trace_events = []
+
+
+def write_trace(path: Path):
+    """Write collected spans as Chrome trace JSON (.json) or JSON lines."""
+    events = _trace_events or []
+    if path.suffix == '.json':
+        data = json.dumps({'displayTimeUnit': 'ms', 'traceEvents': [
+            {'name': name, 'ph': 'X', 'ts': round((start - _STARTED) * 1e6, 1), 'dur': round(duration * 1e6, 1),
+             'pid': pid, 'tid': tid, 'args': args}
+            for name, start, duration, pid, tid, args in events
+        ]})
+    else:
+        data = ''.join(json.dumps({'name': name, 'start_ms': round((start - _STARTED) * 1000, 3),
+                                   'duration_ms': round(duration * 1000, 3), 'pid': pid, 'tid': tid, **args}) + '\n'
+                       for name, start, duration, pid, tid, args in sorted(events, key=lambda e: e[1]))
+    atomic_write(path, data)
+    print(f"🧵 Trace: {len(events)} span(s) written to {path.as_posix()}", file=sys.stderr)
+
+
+# =============================================================================
+# Atomic Writes & Locking
+# =============================================================================
+#
+# Every output is written to a temp file in the same directory and renamed
+# over the target, so a crash never leaves a truncated page or feed behind.
+# Commands that change the site hold an exclusive advisory lock on
+# .site/lock for the whole transaction (write the source, build, feeds), so
+# concurrent `post`/`publish-draft` runs queue up instead of losing posts.
+
+LOCK_PATH = Path(".site") / "lock"
+
+# Permissions for new files, as a plain open() would create them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+_lock_depth = 0
+_thread_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def atomic_open(path: Path, mode: str = 'w', sync: bool = True):
+    """Open a temp file that replaces path only if the block completes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tempfile = lazy_import('tempfile')
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write(path: Path, data: str | bytes, sync: bool = True):
+    """Replace path with data in one step."""
+    with atomic_open(path, 'wb' if isinstance(data, bytes) else 'w', sync=sync) as f:
+        f.write(data)
+
+
+def _acquire(f) -> bool:
+    """Try to take the lock on f without blocking."""
+    try:
+        if HAS_FCNTL:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def site_lock():
+    """Hold the exclusive site lock (re-entrant within one thread)."""
+    global _lock_depth
+    # Threads of one process (serve) queue on _thread_lock; processes on the file
+    with _thread_lock:
+        if _lock_depth:
+            _lock_depth += 1
+            try:
+                yield
+            finally:
+                _lock_depth -= 1
+            return
+
+        LOCK_PATH.parent.mkdir(exist_ok=True)
+        f = open(LOCK_PATH, 'a+')
+        if not _acquire(f):
+            print("⏳ Waiting for another manager.py run to finish...")
+            while not _acquire(f):
+                time.sleep(0.05)
+        _lock_depth = 1
+        try:
+            yield
+        finally:
+            _lock_depth = 0
+            # Closing the file releases the lock
+            f.close()
+
+
+def site_locked(func):
+    """Run func while holding the site lock."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with site_lock():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# =============================================================================
+# BEADS (bd) Integration
+# =============================================================================
+#
+# Read-only queries (ready tasks) come straight from .beads/issues.jsonl,
+# parsed once per file change, so listing never waits on a `bd` process.
+# The JSONL is skipped when the bd database is newer (an export is still
+# pending) and `bd ready` is asked instead. Writes go through `bd`, spawned
+# with asyncio so they can overlap other work; publish-drafts closes all of
+# its tasks in one `bd close`. BD_BIN points the client at
+# another executable, e.g. a fake bd script in tests.
+
+BEADS_DIR = Path(".beads")
+BD_BIN = os.environ.get("BD_BIN", "bd")
+BD_READY_TTL = 5.0  # seconds a `ready` answer is reused
+
+
+class BeadsClient:
+    """Async BEADS client: JSONL reads, batched and pipelined bd writes."""
+
+    def __init__(self, beads_dir: Path = BEADS_DIR, bd: str = BD_BIN, ready_ttl: float = BD_READY_TTL):
+        self.beads_dir = beads_dir
+        self.bd = bd
+        self.ready_ttl = ready_ttl
+        self._issues = None  # ((mtime_ns, size), {id: issue})
+        self._ready = None   # (monotonic time, tasks)
+
+    async def run(self, *args: str, json_output: bool = True) -> dict | list | str | None:
+        """Run one bd command and return its (JSON-decoded) output."""
+        asyncio = lazy_import('asyncio')
+        cmd = [self.bd, *args]
+        if json_output and '--json' not in args:
+            cmd.append('--json')
+        with span('run_bd', command=' '.join(args)) as s:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            except FileNotFoundError:
+                print("⚠️  bd not found. Install with: brew install steveyegge/beads/bd")
+                return None
+            stdout, stderr = await proc.communicate()
+            s.set(returncode=proc.returncode, bytes_out=len(stdout))
+        if proc.returncode != 0:
+            print(f"⚠️  `{' '.join(cmd)}` failed (exit {proc.returncode})")
+            if stderr.strip():
+                print(f"   {stderr.decode('utf-8', 'replace').strip()}")
+            return None
+
+        output = stdout.decode('utf-8').strip()
+        if json_output:
+            try:
+                return json.loads(output)
+            except json.JSONDecodeError:
+                pass
+        return output
+
+    def issues(self) -> dict[str, dict] | None:
+        """All issues from issues.jsonl by id, or None if it's missing or behind the database."""
+        jsonl = self.beads_dir / "issues.jsonl"
+        try:
+            stat = jsonl.stat()
+        except OSError:
+            return None
+        db = self.beads_dir / "beads.db"
+        if db.exists() and db.stat().st_mtime_ns > stat.st_mtime_ns:
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._issues is None or self._issues[0] != key:
+            issues = {}
+            with open(jsonl, encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        issue = json.loads(line)
+                        issues[issue['id']] = issue
+                    except (ValueError, TypeError, KeyError):
+                        print(f"⚠️  Skipping malformed line {number} of {jsonl.as_posix()}")
+            self._issues = (key, issues)
+        return self._issues[1]
+
+    def ready_local(self) -> list[dict] | None:
+        """Ready tasks from the cache or issues.jsonl, or None if bd has to be asked."""
+        if self._ready and time.monotonic() - self._ready[0] < self.ready_ttl:
+            return self._ready[1]
+
+        with span('bd.read_issues') as s:
+            issues = self.issues()
+            s.set(issues=len(issues) if issues is not None else None)
+        if issues is None:
+            return None
+        tasks = []
+        for issue in issues.values():
+            if issue.get('status') != 'open':
+                continue
+            blockers = [dep['depends_on_id'] for dep in issue.get('dependencies') or []
+                        if dep.get('type', 'blocks') == 'blocks']
+            if any(issues.get(b, {}).get('status', 'closed') != 'closed' for b in blockers):
+                continue
+            tasks.append(issue)
+        tasks.sort(key=lambda t: (t.get('priority', 2), t.get('created_at', '')))
+        self._ready = (time.monotonic(), tasks)
+        return tasks
+
+    async def ready(self) -> list[dict]:
+        """Open issues with no open blockers, highest priority first."""
+        tasks = self.ready_local()
+        if tasks is None:
+            result = await self.run('ready')
+            tasks = result if isinstance(result, list) else []
+            self._ready = (time.monotonic(), tasks)
+        return tasks
+
+    async def create(self, title: str, issue_type: str = 'task', priority: int = 2) -> dict | None:
+        """Create an issue; returns bd's record of it."""
+        self._ready = None
+        result = await self.run('create', title, '-t', issue_type, '-p', str(priority))
+        return result if isinstance(result, dict) else None
+
+    async def close(self, *task_ids: str, reason: str = "Published") -> bool:
+        """Close one or more tasks with a single bd call."""
+        self._ready = None
+        return await self.run('close', *task_ids, '--reason', reason) is not None
+
+
+BEADS = BeadsClient()
+
+
+def run_bd(args: list[str], json_output: bool = True) -> dict | str | None:
+    """Run a bd command and return the result."""
+    return lazy_import('asyncio').run(BEADS.run(*args, json_output=json_output))
+
+
+def bd_ready() -> list[dict]:
+    """Get list of ready (unblocked) tasks from bd."""
+    tasks = BEADS.ready_local()
+    if tasks is None:
+        tasks = lazy_import('asyncio').run(BEADS.ready())
+    return tasks
+
+
+def bd_create_post_task(title: str, priority: int = 2) -> str | None:
+    """Create a bd task for a post idea. Returns task ID."""
+    result = lazy_import('asyncio').run(BEADS.create(f'Write post: {title}', 'task', priority))
+    return result.get('id') if result else None
+
+
+def bd_close_task(task_id: str, reason: str = "Published") -> bool:
+    """Close a bd task."""
+    return lazy_import('asyncio').run(BEADS.close(task_id, reason=reason))
+
+
+def close_tasks_during_feeds(task_ids: list[str], reason: str) -> bool:
+    """Close bd tasks (one bd call) while the feeds regenerate.
+
+    The feeds stay on this thread, so a site lock it holds is re-entered.
+    """
+    ThreadPoolExecutor = lazy_import('concurrent.futures').ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        closing = pool.submit(lazy_import('asyncio').run, BEADS.close(*task_ids, reason=reason))
+        generate_rss()
+        return closing.result()
+
+
+def task_post_title(task: dict) -> str:
+    """A task's title without its "Write post:" prefix."""
+    title = task.get('title', 'Untitled')
+    if title.lower().startswith('write post:'):
+        title = title[11:].strip()
+    return title
+
+
+def draft_task_ids(frontmatters: list[dict]) -> list[str]:
+    """bd tasks that drafts fulfil: their `task` key, or a ready "Write post: <title>" task."""
+    if not BEADS.beads_dir.exists():
+        return []
+    ids, titles = [], set()
+    for frontmatter in frontmatters:
+        if frontmatter.get('task'):
+            ids.append(str(frontmatter['task']))
+        else:
+            titles.add(frontmatter['title'].strip().lower())
+    if titles:
+        ids += [task['id'] for task in bd_ready() if 'id' in task and task_post_title(task).lower() in titles]
+    return list(dict.fromkeys(ids))
+
+
+def bd_list_ready():
+    """Display ready tasks for posting."""
+    tasks = bd_ready()
+
+    if not tasks:
+        print("📭 No ready tasks. Create one with:")
+        print("   python manager.py idea 'Post title'")
+        print("   or: bd create 'Write post: Topic' -t task -p 2")
+        return []
+
+    print(f"📋 Ready to write ({len(tasks)} tasks):\n")
+    for i, task in enumerate(tasks, 1):
+        task_id = task.get('id', 'unknown')
+        title = task.get('title', 'Untitled')
+        priority = task.get('priority', 2)
+        print(f"   {i}. [{task_id}] (P{priority}) {title}")
+
+    return tasks
+
+
+def bd_publish_flow():
+    """Interactive flow: pick a ready task, write post, close task."""
+    tasks = bd_ready()
+
+    if not tasks:
+        print("📭 No ready tasks to publish.")
+        print("   Create post ideas with: python manager.py idea 'Topic'")
+        return False
+
+    print(f"\n📋 Ready tasks ({len(tasks)}):\n")
+    for i, task in enumerate(tasks, 1):
+        task_id = task.get('id', 'unknown')
+        title = task.get('title', 'Untitled')
+        print(f"   {i}. [{task_id}] {title}")
+
+    print("\n   0. Cancel")
+
+    try:
+        choice = input("\nSelect task number: ").strip()
+        if choice == '0' or not choice:
+            print("Cancelled.")
+            return False
+
+        idx = int(choice) - 1
+        if idx < 0 or idx >= len(tasks):
+            print("Invalid selection.")
+            return False
+
+        task = tasks[idx]
+        task_id = task.get('id')
+
+        post_title = task_post_title(task)
+
+        print(f"\n✏️  Writing post: {post_title}")
+        print("   Enter content (Markdown supported). End with an empty line:\n")
+
+        lines = []
+        while True:
+            line = input()
+            if line == '':
+                break
+            lines.append(line)
+
+        content = '\n'.join(lines)
+
+        if not content.strip():
+            print("❌ No content provided. Cancelled.")
+            return False
+
+        # Get tags
+        tags_input = input("\nTags (comma-separated, or Enter to skip): ").strip()
+        tags = [t.strip() for t in tags_input.split(',') if t.strip()] if tags_input else []
+
+        # Create the post
+        success = create_post(post_title, content, tags)
+
+        if success:
+            # Close the bd task and regenerate RSS side by side
+            if close_tasks_during_feeds([task_id], "Published to site"):
+                print(f"   ✅ Closed task {task_id}")
+
+            print("\n💡 Ready to deploy:")
+            print("   git add . && git commit -m 'New post' && git push")
+
+        return success
+
+    except (ValueError, KeyboardInterrupt):
+        print("\nCancelled.")
+        return False
+
+
+@functools.cache
+def package_fingerprint(name: str) -> str:
+    """Identifies an installed package (markdown, pygments) without importing it.
+
+    Reinstalling or upgrading rewrites the package, changing its mtime.
+    """
+    origin = find_spec(name).origin
+    return f"{origin}:{os.stat(origin).st_mtime_ns}"
+
+
+# Classes given to images in posts (the stylesheet build scans these too)
+IMAGE_CLASSES = "w-full max-w-2xl rounded-lg shadow-md my-4 mx-auto"
+
+
+def style_images(html: str) -> str:
+    """Add responsive styling to images in HTML."""
+    # Match <img> tags and add styling classes
+    img_pattern = re.compile(r'<img\s+([^>]*)>', re.IGNORECASE)
+
+    def add_classes(match):
+        attrs = match.group(1)
+        # Don't add classes if already has class attribute
+        if 'class=' in attrs:
+            return match.group(0)
+        # Add responsive, rounded styling
+        return f'<img class="{IMAGE_CLASSES}" {attrs}>'
+
+    with span('style_images', bytes=len(html)) as s:
+        html, count = img_pattern.subn(add_classes, html)
+        s.set(images=count)
+    return html
+
+
+# Fenced code blocks with a language are highlighted at build time into
+# <span class="..."> tokens, so pages need no highlighter script. Pygments
+# token types are folded into the few classes below (styled in site.css);
+# each (language, code) pair is tokenized once and then served from the
+# render cache, so a snippet shared by several posts or surviving an edit is
+# never re-tokenized.
+
+# Bump when highlight_code changes its output
+HIGHLIGHT_VERSION = 1
+
+# Pygments token type -> class; the first match wins, so subtypes come first
+HIGHLIGHT_CLASSES = (
+    ('Comment', 'c'), ('String', 's'), ('Number', 'm'), ('Keyword.Constant', 'kc'), ('Keyword', 'k'),
+    ('Name.Builtin', 'nb'), ('Name.Function', 'nf'), ('Name.Class', 'nc'), ('Name.Decorator', 'nd'),
+    ('Name.Tag', 'nt'), ('Name.Attribute', 'na'), ('Operator.Word', 'k'), ('Generic.Inserted', 'gi'),
+    ('Generic.Deleted', 'gd'), ('Generic.Heading', 'gh'), ('Generic.Subheading', 'gh'), ('Generic.Prompt', 'gp'),
+)
+
+CODE_BLOCK_PATTERN = re.compile(r'<pre><code class="language-([^"]+)">(.*?)</code></pre>', re.DOTALL)
+
+
+@functools.cache
+def get_lexer(language: str):
+    """Pygments lexer for a fence's language name, or None if Pygments doesn't know it."""
+    lexers = lazy_import('pygments.lexers')
+    util = lazy_import('pygments.util')
+    try:
+        return lexers.get_lexer_by_name(language, stripnl=False, ensurenl=False)
+    except util.ClassNotFound:
+        return None
+
+
+@functools.cache
+def token_class(ttype) -> str:
+    """Class for a Pygments token type ('' for plain text)."""
+    token = lazy_import('pygments.token')
+    for name, cls in HIGHLIGHT_CLASSES:
+        if ttype in token.string_to_tokentype(name):
+            return cls
+    return ''
+
+
+def highlight_code(language: str, code: str) -> str | None:
+    """HTML for code with highlighted tokens, or None if the language is unknown.
+
+    Adjacent tokens with the same class share one <span>; whitespace stays outside.
+    """
+    lexer = get_lexer(language)
+    if lexer is None:
+        return None
+    out, run, run_class = [], [], ''
+    for ttype, value in lexer.get_tokens(code):
+        cls = token_class(ttype) if value.strip() else ''
+        if cls != run_class and run:
+            text = escape(''.join(run), quote=False)
+            out.append(f'<span class="{run_class}">{text}</span>' if run_class else text)
+            run = []
+        run_class = cls
+        run.append(value)
+    if run:
+        text = escape(''.join(run), quote=False)
+        out.append(f'<span class="{run_class}">{text}</span>' if run_class else text)
+    return ''.join(out)
+
+
+def highlight_code_blocks(html: str) -> str:
+    """Highlight <pre><code class="language-..."> blocks (rendered Markdown or an HTML source), one cache lookup per block."""
+    with span('highlight', bytes=len(html)) as s:
+        stats = {'blocks': 0, 'cached': 0}
+
+        def replace(match):
+            language, code = match.group(1), unescape(match.group(2))
+            key = hash_bytes(f"highlight\0{HIGHLIGHT_VERSION}\0{package_fingerprint('pygments')}\0"
+                             f"{language}\0{code}".encode('utf-8'))
+            stats['blocks'] += 1
+            highlighted = render_cache_get(key)
+            if highlighted is not None:
+                stats['cached'] += 1
+            else:
+                # Unknown languages are cached as '' - looking them up is the slow case
+                highlighted = highlight_code(language, code) or ''
+                render_cache_put(key, highlighted)
+            if not highlighted:
+                return match.group(0)
+            return f'<pre class="highlight"><code class="language-{language}">{highlighted}</code></pre>'
+
+        html = CODE_BLOCK_PATTERN.sub(replace, html)
+        s.set(**stats)
+    return html
+
+
+# Bump when style_images or the renderer setup changes output for the same source
+RENDERER_VERSION = 3
+MARKDOWN_EXTENSIONS = "fenced_code,tables,nl2br"
+
+_markdown_renderer = None
+
+
+def get_markdown_renderer():
+    """Return the shared Markdown instance, created on first use."""
+    global _markdown_renderer
+    if _markdown_renderer is None:
+        markdown = lazy_import('markdown')
+        from markdown.extensions.fenced_code import FencedCodeExtension
+        from markdown.extensions.tables import TableExtension
+        _markdown_renderer = markdown.Markdown(extensions=[
+            FencedCodeExtension(),
+            TableExtension(),
+            'nl2br'  # Convert newlines to <br>
+        ])
+    return _markdown_renderer
+
+
+def convert_markdown(raw_content: str) -> str:
+    """Convert markdown to HTML if available, reusing cached renders."""
+    with span('convert_markdown', bytes_in=len(raw_content)) as s:
+        key = render_cache_key(raw_content)
+        cached = render_cache_get(key)
+        if cached is not None:
+            s.set(cache='hit', bytes_out=len(cached))
+            return cached
+
+        if HAS_MARKDOWN:
+            md = get_markdown_renderer()
+            md.reset()
+            html = md.convert(raw_content)
+            # Add styling to images
+            html = style_images(html)
+            if HAS_PYGMENTS and '<pre><code class="language-' in html:
+                html = highlight_code_blocks(html)
+        else:
+            # Basic fallback: escape HTML and wrap in paragraph
+            paragraphs = raw_content.split('\n\n')
+            html = ''.join(f'<p>{escape(p)}</p>' for p in paragraphs if p.strip())
+
+        render_cache_put(key, html)
+        s.set(cache='miss' if RENDER_CACHE_ENABLED else 'off', bytes_out=len(html))
+    return html
+
+
+def generate_date_display() -> tuple[str, str]:
+    """Generate both display date and ISO date."""
+    now = datetime.datetime.now()
+    # Display format: "2024-12-22::14:30"
+    display = now.strftime("%Y-%m-%d::%H:%M")
+    # ISO format for RSS and sorting
+    iso = now.isoformat()
+    return display, iso
+
+
+def create_tags_html(tags: list[str]) -> str:
+    """Generate HTML for tags."""
+    if not tags:
+        return ""
+    tags_inner = '\n'.join(
+        TAG_TEMPLATE.format(tag=tag.strip(), slug=slugify(tag.strip())) for tag in tags if tag.strip()
+    )
+    return TAGS_TEMPLATE.format(tags=tags_inner)
+
+
+@site_locked
+def create_post(title: str, raw_content: str, tags: list[str] = None, slug: str = None,
+                frontmatter: dict = None):
+    """Create a new post source in posts/ and rebuild index.html.
+
+    frontmatter carries a draft's other keys (date, excerpt, guid...) into
+    the source. Returns the new source's path, or False if the post
+    couldn't be added.
+    """
+    if not is_site_dir():
+        return False
+
+    started = time.perf_counter()
+    date_display, iso_date = generate_date_display()
+    iso_date = normalize_date((frontmatter or {}).get('date')) or iso_date
+    source = write_post_source(title, raw_content, tags or [], iso_date, slug=slug, extra=frontmatter)
+
+    # Don't leave a source behind that the live pages don't show
+    try:
+        built = build_site()
+    except BaseException:
+        source.unlink(missing_ok=True)
+        raise
+    if not built:
+        source.unlink(missing_ok=True)
+        return False
+
+    print(f"✅ Post added: '{title}'")
+    print(f"   📅 {date_display}")
+    print(f"   📁 Source: {source.as_posix()}")
+    if tags:
+        print(f"   🏷️  {', '.join(tags)}")
+
+    record_span('create_post', started, time.perf_counter() - started, source=source.as_posix(),
+                bytes=len(raw_content))
+    return source
+
+
+FEED_ITEMS = 20  # most recent posts per feed
+FEED_VERSION = 3  # bump when the feed layout changes
+FEEDS_STATE_PATH = Path(".site") / "feeds.json"
+
+
+def parse_iso_date(iso_date: str) -> datetime.datetime:
+    """Parse an ISO date, falling back to its YYYY-MM-DD prefix (or the epoch)."""
+    for candidate in (iso_date, iso_date[:10]):
+        try:
+            return datetime.datetime.fromisoformat(candidate)
+        except ValueError:
+            continue
+    return datetime.datetime(1970, 1, 1)
+
+
+def rfc822_date(iso_date: str) -> str:
+    """RSS pubDate for an ISO date."""
+    return parse_iso_date(iso_date).strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+
+def rfc3339_date(iso_date: str) -> str:
+    """Atom timestamp for an ISO date."""
+    return parse_iso_date(iso_date).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def post_url(post: dict) -> str:
+    """Absolute URL of a post's permalink page."""
+    return f"{SITE_URL}/{post_page_url(post['slug'])}"
+
+
+def _text_element(xml, name: str, text: str, attrs: dict = None, indent: str = ''):
+    """Write <name attrs>text</name> on its own line (xml is a lazily imported saxutils.XMLGenerator)."""
+    xml.ignorableWhitespace(indent)
+    xml.startElement(name, attrs or {})
+    xml.characters(text)
+    xml.endElement(name)
+    xml.ignorableWhitespace('\n')
+
+
+def write_rss_feed(path: Path, posts: list[dict], title: str, link: str, stylesheet: str):
+    """Stream an RSS 2.0 feed for posts (newest first) to path."""
+    self_url = f"{SITE_URL}/{path.as_posix()}"
+    updated = rfc822_date(posts[0]['date']) if posts else rfc822_date('1970-01-01')
+
+    with atomic_open(path) as out:
+        xml = lazy_import('xml.sax.saxutils').XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+        xml.startDocument()
+        xml.processingInstruction('xml-stylesheet', f'type="text/xsl" href="{stylesheet}"')
+        xml.ignorableWhitespace('\n')
+        xml.startElement('rss', {'version': '2.0', 'xmlns:atom': 'http://www.w3.org/2005/Atom'})
+        xml.ignorableWhitespace('\n  ')
+        xml.startElement('channel', {})
+        xml.ignorableWhitespace('\n')
+        _text_element(xml, 'title', title, indent='    ')
+        _text_element(xml, 'link', link, indent='    ')
+        _text_element(xml, 'description', SITE_DESCRIPTION, indent='    ')
+        _text_element(xml, 'language', 'en-us', indent='    ')
+        _text_element(xml, 'lastBuildDate', updated, indent='    ')
+        xml.ignorableWhitespace('    ')
+        xml.startElement('atom:link', {'href': self_url, 'rel': 'self', 'type': 'application/rss+xml'})
+        xml.endElement('atom:link')
+        xml.ignorableWhitespace('\n')
+        _text_element(xml, 'author', AUTHOR, indent='    ')
+
+        for post in posts:
+            xml.ignorableWhitespace('    ')
+            xml.startElement('item', {})
+            xml.ignorableWhitespace('\n')
+            _text_element(xml, 'title', post['title'], indent='      ')
+            _text_element(xml, 'link', post_url(post), indent='      ')
+            _text_element(xml, 'description', read_post_html(post), indent='      ')
+            _text_element(xml, 'pubDate', rfc822_date(post['date']), indent='      ')
+            for tag in post['tags']:
+                _text_element(xml, 'category', tag, indent='      ')
+            _text_element(xml, 'guid', post['guid'],
+                          {'isPermaLink': 'true' if post['guid'] == post_url(post) else 'false'}, indent='      ')
+            xml.ignorableWhitespace('    ')
+            xml.endElement('item')
+            xml.ignorableWhitespace('\n')
+
+        xml.ignorableWhitespace('  ')
+        xml.endElement('channel')
+        xml.ignorableWhitespace('\n')
+        xml.endElement('rss')
+        xml.ignorableWhitespace('\n')
+        xml.endDocument()
+
+
+def write_atom_feed(path: Path, posts: list[dict], title: str, link: str):
+    """Stream an Atom 1.0 feed for posts (newest first) to path."""
+    updated = rfc3339_date(posts[0]['date']) if posts else rfc3339_date('1970-01-01')
+
+    with atomic_open(path) as out:
+        xml = lazy_import('xml.sax.saxutils').XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+        xml.startDocument()
+        xml.startElement('feed', {'xmlns': 'http://www.w3.org/2005/Atom'})
+        xml.ignorableWhitespace('\n')
+        _text_element(xml, 'id', f"{SITE_URL}/{path.as_posix()}", indent='  ')
+        _text_element(xml, 'title', title, indent='  ')
+        _text_element(xml, 'subtitle', SITE_DESCRIPTION, indent='  ')
+        _text_element(xml, 'updated', updated, indent='  ')
+        for rel, href in (('self', f"{SITE_URL}/{path.as_posix()}"), ('alternate', link)):
+            xml.ignorableWhitespace('  ')
+            xml.startElement('link', {'rel': rel, 'href': href})
+            xml.endElement('link')
+            xml.ignorableWhitespace('\n')
+        xml.ignorableWhitespace('  ')
+        xml.startElement('author', {})
+        xml.startElement('name', {})
+        xml.characters(AUTHOR)
+        xml.endElement('name')
+        xml.endElement('author')
+        xml.ignorableWhitespace('\n')
+
+        for post in posts:
+            xml.ignorableWhitespace('  ')
+            xml.startElement('entry', {})
+            xml.ignorableWhitespace('\n')
+            _text_element(xml, 'id', post['guid'], indent='    ')
+            _text_element(xml, 'title', post['title'], indent='    ')
+            _text_element(xml, 'published', rfc3339_date(post['date']), indent='    ')
+            _text_element(xml, 'updated', rfc3339_date(post['date']), indent='    ')
+            if post['excerpt']:
+                _text_element(xml, 'summary', post['excerpt'], indent='    ')
+            xml.ignorableWhitespace('    ')
+            xml.startElement('link', {'rel': 'alternate', 'href': post_url(post)})
+            xml.endElement('link')
+            xml.ignorableWhitespace('\n')
+            for tag in post['tags']:
+                xml.ignorableWhitespace('    ')
+                xml.startElement('category', {'term': tag})
+                xml.endElement('category')
+                xml.ignorableWhitespace('\n')
+            _text_element(xml, 'content', read_post_html(post), {'type': 'html'}, indent='    ')
+            xml.ignorableWhitespace('  ')
+            xml.endElement('entry')
+            xml.ignorableWhitespace('\n')
+
+        xml.endElement('feed')
+        xml.ignorableWhitespace('\n')
+        xml.endDocument()
+
+
+def feed_fingerprint(kind: str, title: str, posts: list[dict]) -> str:
+    """Hash of everything a feed's bytes depend on."""
+    items = [[p['slug'], p['title'], p['date'], p['tags'], p['guid'], p['excerpt'], p.get('hash'), p.get('page')]
+             for p in posts]
+    config = [FEED_VERSION, kind, title, SITE_URL, SITE_DESCRIPTION, AUTHOR]
+    return hash_bytes(json.dumps([config, items]).encode('utf-8'))
+
+
+@site_locked
+def generate_rss():
+    """Generate the RSS, Atom and per-tag feeds from the post index.
+
+    A feed is only rewritten when the hash of its item set changes, and
+    lastBuildDate is the newest item's date, so unchanged feeds keep
+    identical bytes (and ETags).
+    """
+    started = time.perf_counter()
+    posts = load_post_index()
+
+    if not posts:
+        print("⚠️  No posts found in the post index.")
+        print("   Run 'python manager.py build' to generate posts from posts/.")
+        return False
+
+    # (path, kind, title, link, posts)
+    feeds = [
+        (Path("feed.xml"), 'rss', SITE_TITLE, SITE_URL, posts[:FEED_ITEMS]),
+        (Path("atom.xml"), 'atom', SITE_TITLE, SITE_URL, posts[:FEED_ITEMS]),
+    ]
+    by_tag = {}
+    for post in posts:
+        for tag in post['tags']:
+            by_tag.setdefault(slugify(tag), (tag, []))[1].append(post)
+    for tag_slug, (tag, tagged) in sorted(by_tag.items()):
+        feeds.append((Path("tags") / tag_slug / "feed.xml", 'rss', f"{SITE_TITLE} · #{tag}",
+                      f"{SITE_URL}/tags/{tag_slug}/", tagged[:FEED_ITEMS]))
+
+    try:
+        previous = json.loads(FEEDS_STATE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        previous = {}
+
+    state = {}
+    written = 0
+    for path, kind, title, link, items in feeds:
+        key = path.as_posix()
+        state[key] = feed_fingerprint(kind, title, items)
+        if previous.get(key) == state[key] and path.exists():
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with span('write_feed', path=key, kind=kind, items=len(items)):
+            if kind == 'atom':
+                write_atom_feed(path, items, title, link)
+            else:
+                stylesheet = '../' * (len(path.parts) - 1) + 'feed.xsl'
+                write_rss_feed(path, items, title, link, stylesheet)
+        written += 1
+
+    for stale in set(previous) - set(state):
+        Path(stale).unlink(missing_ok=True)
+
+    atomic_write(FEEDS_STATE_PATH, json.dumps(state, indent=1, sort_keys=True))
+    record_span('generate_rss', started, time.perf_counter() - started, feeds=len(feeds), written=written)
+
+    print(f"✅ Feeds generated: feed.xml, atom.xml + {len(by_tag)} tag feed(s)")
+    print(f"   📰 {min(len(posts), FEED_ITEMS)} of {len(posts)} posts in the main feed")
+    print(f"   📝 {written} of {len(feeds)} feed(s) changed")
+    return True
+
+
+def list_posts():
+    """List recent posts from the post index."""
+    posts = load_post_index()
+
+    if not posts:
+        print("📭 No posts found.")
+        return
+
+    print(f"📋 Found {len(posts)} post(s):\n")
+    for i, post in enumerate(posts[:10], 1):
+        title = post['title'][:50] + "..." if len(post['title']) > 50 else post['title']
+        date = post['date'][:10] if post['date'] else "unknown"
+        print(f"   {i}. [{date}] {title}  ({post['reading_time']} min)")
+
+
+# =============================================================================
+# Drafts Workflow (New!)
+# =============================================================================
+
+DRAFTS_DIR = Path("drafts")
+DRAFT_INDEX_PATH = Path(".site") / "drafts.json"
+DRAFT_SORT_KEYS = ('name', 'date', 'title', 'tag')
+
+
+# `key: value` at the start of a line; anything indented continues the key above
+FRONTMATTER_KEY_PATTERN = re.compile(r'([A-Za-z_][\w-]*)[ \t]*:(.*)$')
+FLOW_ITEM_PATTERN = re.compile(r'\s*("(?:[^"\\]|\\.)*"|\'(?:[^\']|\'\')*\'|[^,]+)')
+BLOCK_SCALAR_INDICATORS = ('|', '|-', '>', '>-')
+# Frontmatter keys kept as written ("title: 3.10" stays "3.10")
+STRING_KEYS = frozenset({'title', 'guid', 'excerpt', 'description'})
+
+
+def parse_scalar(text: str, typed: bool = True):
+    """Typed value of a YAML scalar: quoted or plain string, int, float, bool or None.
+
+    With typed=False plain scalars stay strings (for title, guid...).
+    """
+    text = text.strip()
+    if text.startswith('"'):
+        match = re.match(r'"((?:[^"\\]|\\.)*)"', text)
+        if match:
+            try:
+                return json.loads(match.group(0))
+            except ValueError:
+                return match.group(1)
+        return text.strip('"')
+    if text.startswith("'"):
+        match = re.match(r"'((?:[^']|'')*)'", text)
+        return match.group(1).replace("''", "'") if match else text.strip("'")
+
+    text = re.sub(r'\s+#.*$', '', text)
+    if text.lower() in ('', '~', 'null'):
+        return None
+    if not typed:
+        return text
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    if re.fullmatch(r'[-+]?\d+', text):
+        return int(text)
+    if re.fullmatch(r'[-+]?(\d+\.\d*|\.\d+)', text):
+        return float(text)
+    return text
+
+
+def frontmatter_value(value: str, more: list[str], typed: bool = True):
+    """Typed value of one frontmatter key from its inline text and indented lines."""
+    if value in BLOCK_SCALAR_INDICATORS:
+        block = lazy_import('textwrap').dedent('\n'.join(more)).strip('\n')
+        if value.startswith('>'):
+            block = '\n'.join(' '.join(para.split()) for para in block.split('\n\n'))
+        return block
+    items = [line.strip()[1:] for line in more if line.strip()]
+    if not value and items and all(line.strip().startswith('-') for line in more if line.strip()):
+        return [parse_scalar(item) for item in items]
+    if value.startswith('[') and value.rstrip().endswith(']'):
+        inner = value.strip()[1:-1]
+        return [parse_scalar(item) for item in FLOW_ITEM_PATTERN.findall(inner) if item.strip()]
+    if more:
+        value = ' '.join([value] + [line.strip() for line in more if line.strip()])
+    return parse_scalar(value, typed)
+
+
+def frontmatter_tags(value) -> list[str]:
+    """Tags from a list or a comma-separated string (items may be quoted), without blanks or leading #."""
+    if value is None:
+        return []
+    items = value if isinstance(value, list) else [parse_scalar(item, typed=False)
+                                                   for item in FLOW_ITEM_PATTERN.findall(str(value))]
+    return [tag for tag in (str(item).strip().lstrip('#').strip() for item in items if item is not None) if tag]
+
+
+def parse_frontmatter_lines(lines) -> dict:
+    """Parse the YAML subset used in frontmatter into typed values.
+
+    Handles quoted strings (with escapes and colons), numbers, booleans,
+    flow `[a, b]` and block `- a` lists, and `|` / `>` block strings.
+    tags is always a list of strings; STRING_KEYS are never coerced to
+    numbers or booleans.
+    """
+    entries = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        # Inside a block string, blank and indented lines (even "# ...") are content
+        if entries and entries[-1][1] in BLOCK_SCALAR_INDICATORS and (not line.strip() or line[:1].isspace()):
+            entries[-1][2].append(line)
+            continue
+        if not line.strip() or line.lstrip().startswith('#'):
+            if entries:
+                entries[-1][2].append('')
+            continue
+        match = FRONTMATTER_KEY_PATTERN.match(line)
+        if match:
+            entries.append((match.group(1), match.group(2).strip(), []))
+        elif entries:
+            entries[-1][2].append(line)
+
+    frontmatter = {}
+    for key, value, more in entries:
+        while more and not more[-1]:
+            more.pop()
+        frontmatter[key] = frontmatter_value(value, more, typed=key not in STRING_KEYS)
+    if 'tags' in frontmatter:
+        frontmatter['tags'] = frontmatter_tags(frontmatter['tags'])
+    return frontmatter
+
+
+def scan_frontmatter(f) -> dict | None:
+    """Read frontmatter from an open text file up to the closing --- line.
+
+    Leaves the file positioned just after the block; returns None if the file
+    doesn't start with a complete block.
+    """
+    if f.readline().rstrip() != '---':
+        return None
+    lines = []
+    for line in f:
+        if line.rstrip() == '---':
+            return parse_frontmatter_lines(lines)
+        lines.append(line)
+    return None
+
+
+def parse_frontmatter(content: str) -> tuple[dict, str]:
+    """Parse YAML frontmatter from markdown content."""
+    f = lazy_import('io').StringIO(content)
+    frontmatter = scan_frontmatter(f)
+    if frontmatter is None:
+        return {}, content
+    return frontmatter, f.read().strip()
+
+
+def read_draft(draft_path: Path) -> tuple[dict, str]:
+    """Frontmatter (with title and tags always set) and body of a draft."""
+    with open(draft_path, encoding='utf-8') as f:
+        frontmatter = scan_frontmatter(f)
+        if frontmatter is None:
+            f.seek(0)
+            frontmatter, body = {}, f.read()
+        else:
+            body = f.read().strip()
+    frontmatter['title'] = str(frontmatter.get('title') or draft_path.stem.replace('-', ' ').title())
+    frontmatter.setdefault('tags', [])
+    return frontmatter, body
+
+
+def scan_draft(path: Path, stat: os.stat_result) -> dict:
+    """Draft record from the frontmatter block only; the body is never read."""
+    with open(path, encoding='utf-8') as f:
+        frontmatter = scan_frontmatter(f) or {}
+    return {
+        'name': path.stem,
+        'title': str(frontmatter.get('title') or path.stem.replace('-', ' ').title()),
+        'tags': frontmatter.get('tags', []),
+        'date': normalize_date(frontmatter.get('date')) or datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        'stat': [stat.st_mtime_ns, stat.st_size],
+    }
+
+
+def scan_drafts(pattern: str = None, tag: str = None, sort: str = 'name') -> list[dict]:
+    """Draft records matching a name glob and tag, sorted by name, date, title or tag.
+
+    Frontmatter is cached in .site/drafts.json keyed by mtime and size, so
+    unchanged drafts cost a stat call. Unreadable drafts are skipped.
+    """
+    if not DRAFTS_DIR.exists():
+        return []
+    try:
+        cache = json.loads(DRAFT_INDEX_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+
+    drafts, index = [], {}
+    with span('scan_drafts') as s:
+        for entry in os.scandir(DRAFTS_DIR):
+            if not entry.name.endswith('.md') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            record = cache.get(entry.name)
+            if not record or record.get('stat') != [stat.st_mtime_ns, stat.st_size]:
+                try:
+                    record = scan_draft(Path(entry.path), stat)
+                except (OSError, UnicodeDecodeError):
+                    continue
+            index[entry.name] = record
+            drafts.append(dict(record, path=DRAFTS_DIR / entry.name))
+        s.set(drafts=len(drafts))
+    if index != cache:
+        try:
+            atomic_write(DRAFT_INDEX_PATH, json.dumps(index), sync=False)
+        except OSError:
+            pass
+
+    if pattern:
+        fnmatch = lazy_import('fnmatch')
+        drafts = [d for d in drafts if fnmatch.fnmatch(d['path'].name, pattern if pattern.endswith('.md') else pattern + '.md')]
+    if tag:
+        drafts = [d for d in drafts if tag.lower() in (t.lower() for t in d['tags'])]
+
+    drafts.sort(key=lambda d: d['name'])
+    if sort == 'date':
+        drafts.sort(key=lambda d: d['date'], reverse=True)
+    elif sort == 'title':
+        drafts.sort(key=lambda d: d['title'].lower())
+    elif sort == 'tag':
+        drafts.sort(key=lambda d: [t.lower() for t in d['tags']] or ['~'])
+    return drafts
+
+
+def find_draft(name: str) -> Path | None:
+    """Path of a draft by file name, or by the slug of its title."""
+    path = DRAFTS_DIR / (name if name.endswith('.md') else name + '.md')
+    if path.exists():
+        return path
+    matches = [d['path'] for d in scan_drafts() if slugify(d['title']) == name.removesuffix('.md')]
+    return matches[0] if len(matches) == 1 else None
+
+
+def list_drafts(pattern: str = None, tag: str = None, sort: str = 'name'):
+    """List all drafts in drafts/ folder."""
+    if not DRAFTS_DIR.exists():
+        print("📭 No drafts folder. Create one with: mkdir drafts")
+        return []
+
+    drafts = scan_drafts(pattern, tag, sort)
+
+    if not drafts:
+        if pattern or tag:
+            print("📭 No matching drafts in drafts/")
+            return []
+        print("📭 No drafts found in drafts/")
+        print("   AI can save drafts here, then you publish with:")
+        print("   python manager.py publish-draft <name>")
+        return []
+
+    print(f"📝 Drafts ({len(drafts)}):\n")
+    for i, draft in enumerate(drafts, 1):
+        print(f"   {i}. {draft['path'].name}  [{draft['date'][:10]}]")
+        print(f"      Title: {draft['title']}")
+        if draft['tags']:
+            print(f"      Tags: {', '.join(draft['tags'])}")
+        print()
+
+    return [draft['path'] for draft in drafts]
+
+
+@site_locked
+def publish_draft(draft_name: str):
+    """Publish a draft from drafts/ folder."""
+    # Find the draft, by file name or title slug
+    draft_path = find_draft(draft_name)
+
+    if draft_path is None:
+        print(f"❌ Draft not found: {(DRAFTS_DIR / draft_name).as_posix()}")
+        print("\n   Available drafts:")
+        list_drafts()
+        return False
+
+    frontmatter, body = read_draft(draft_path)
+    title, tags = frontmatter['title'], frontmatter['tags']
+
+    print(f"📄 Publishing: {title}")
+    print(f"   Tags: {', '.join(tags) if tags else 'none'}")
+
+    # Create the post; its source is archived in posts/ under the draft's name
+    success = create_post(title, body, tags, slug=draft_path.stem, frontmatter=frontmatter)
+
+    if success:
+        draft_path.unlink()
+        print(f"   🗑️  Removed draft: {draft_path.as_posix()}")
+
+        # Generate RSS
+        generate_rss()
+
+        print("\n💡 Ready to deploy:")
+        print("   git add . && git commit -m 'New post' && git push")
+
+    return success
+
+
+@site_locked
+def publish_drafts(pattern: str = None, dry_run: bool = False, jobs: int = 1, tag: str = None) -> bool:
+    """Publish every draft matching pattern and tag (all drafts if None) in one build.
+
+    All or nothing: if any draft can't be read or the build fails, no post
+    is added and every draft stays in drafts/.
+    """
+    paths = [draft['path'] for draft in scan_drafts(pattern, tag)]
+    if not paths:
+        print(f"📭 No drafts matching '{pattern or '*'}'{f' tagged {tag}' if tag else ''} in drafts/")
+        return False
+
+    drafts = []
+    for path in paths:
+        try:
+            frontmatter, body = read_draft(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"❌ Could not read {path.as_posix()}: {e}")
+            return False
+        if not body.strip():
+            print(f"❌ {path.as_posix()} has no content - nothing was published")
+            return False
+        drafts.append((path, frontmatter, body))
+
+    print(f"📄 {'Would publish' if dry_run else 'Publishing'} {len(drafts)} draft(s):")
+    for path, frontmatter, body in drafts:
+        print(f"   • {frontmatter['title']}  [{', '.join(frontmatter['tags']) or 'no tags'}]  "
+              f"{len(body.split())} words  ← {path.name}")
+    if dry_run:
+        return True
+
+    if not is_site_dir():
+        return False
+
+    # Later drafts (by name) get later timestamps, as if published one by one
+    now = datetime.datetime.now()
+    sources = []
+    built = False
+    try:
+        for i, (path, frontmatter, body) in enumerate(drafts):
+            iso_date = (normalize_date(frontmatter.get('date'))
+                        or (now + datetime.timedelta(microseconds=i)).isoformat())
+            sources.append(write_post_source(frontmatter['title'], body, frontmatter['tags'], iso_date,
+                                             slug=path.stem, extra=frontmatter))
+        built = build_site(jobs=jobs)
+    finally:
+        if not built:
+            for source in sources:
+                source.unlink(missing_ok=True)
+    if not built:
+        print("❌ Build failed - no drafts were published")
+        return False
+
+    for path, *_ in drafts:
+        path.unlink()
+    print(f"✅ Published {len(drafts)} draft(s) into posts/ and removed them from drafts/")
+
+    # Their bd tasks are closed in one bd call, overlapping the feed update
+    task_ids = draft_task_ids([frontmatter for _, frontmatter, _ in drafts])
+    if not task_ids:
+        generate_rss()
+    elif close_tasks_during_feeds(task_ids, "Published to site"):
+        print(f"   ✅ Closed {len(task_ids)} bd task(s): {', '.join(task_ids)}")
+
+    print("\n💡 Ready to deploy:")
+    print("   git add . && git commit -m 'New posts' && git push")
+    return True
+
+
+# =============================================================================
+# Incremental Site Build
+# =============================================================================
+#
+# posts/*.md (and posts/*.html imported from the old hand-edited page) are the
+# source of truth. `build` keeps a manifest of per-post content hashes and
+# rendered <article> fragments in .site/, re-renders only sources whose hash
+# changed, and splices the ordered fragments between the markers of the
+# layout.html shell to produce index.html (the newest POSTS_PER_PAGE),
+# page/N/index.html and tags/<tag>/index.html.
+# Pages are only rewritten when their content hash changes.
+
+POSTS_DIR = Path("posts")
+POST_PAGES_DIR = Path("post")
+LAYOUT_PATH = Path("layout.html")
+BUILD_DIR = Path(".site")
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+MANIFEST_VERSION = 2
+POST_INDEX_PATH = BUILD_DIR / "posts.json"
+POST_INDEX_VERSION = 4
+
+# Derived fields stored with each post when it is rendered
+READING_WORDS_PER_MINUTE = 230
+EXCERPT_WORDS = 40
+SUMMARY_FIELDS = ('word_count', 'reading_time', 'excerpt')
+
+POSTS_BEGIN = '<!-- posts:begin (generated by manager.py build - edit posts/ instead) -->'
+POSTS_END = '<!-- posts:end -->'
+
+# Parallel builds pack at least this much Markdown into each worker task
+BUILD_CHUNK_MIN_BYTES = 32 * 1024
+
+ARTICLE_PATTERN = re.compile(r'<article\b[^>]*>.*?</article>', re.DOTALL)
+
+# Relative href/src values that need a ../ prefix on pages below the site root
+RELATIVE_URL_PATTERN = re.compile(r'\b(href|src)="(?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)([^"]*)"')
+SRCSET_PATTERN = re.compile(r'\bsrcset="([^"]*)"')
+INLINE_STYLE_PATTERN = re.compile(r'<style>.*?</style>', re.DOTALL)
+
+
+def slugify(text: str) -> str:
+    """Turn a title into a URL/file-name friendly slug."""
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    return slug or 'post'
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash used for change detection."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def renderer_fingerprint() -> str:
+    """Hash of everything that affects rendered output besides the source itself."""
+    parts = [POST_TEMPLATE, READ_MORE_TEMPLATE, TAGS_TEMPLATE, TAG_TEMPLATE, RELATED_TEMPLATE, RELATED_LINK_TEMPLATE,
+             str(HAS_NUMPY), str(HAS_MARKDOWN), str(RENDERER_VERSION),
+             str(HAS_PYGMENTS), str(HIGHLIGHT_VERSION), repr(HIGHLIGHT_CLASSES), str(HAS_PIL), str(IMAGE_PIPELINE_VERSION), repr(IMAGE_WIDTHS), IMAGE_SIZES]
+    if HAS_MARKDOWN:
+        parts.append(package_fingerprint('markdown'))
+    if HAS_PYGMENTS:
+        parts.append(package_fingerprint('pygments'))
+    return hash_bytes('\0'.join(parts).encode('utf-8'))
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write text to path unless the file already has exactly that content."""
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    atomic_write(path, text)
+    return True
+
+
+def format_date_display(iso_date: str) -> str:
+    """Render an ISO date the way POST_TEMPLATE shows it."""
+    if 'T' not in iso_date:
+        return iso_date[:10]
+    try:
+        return datetime.datetime.fromisoformat(iso_date).strftime("%Y-%m-%d::%H:%M")
+    except ValueError:
+        return iso_date[:10]
+
+
+def normalize_date(value) -> str | None:
+    """A frontmatter date as an ISO string ('YYYY-MM-DD' stays a date), or None if invalid."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        parsed = datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return text if len(text) == 10 else parsed.isoformat()
+
+
+def post_page_url(slug: str) -> str:
+    """Site-relative URL of a post's permalink page."""
+    return f"{POST_PAGES_DIR.as_posix()}/{slug}/"
+
+
+def write_post_source(title: str, body: str, tags: list[str], iso_date: str,
+                      slug: str = None, suffix: str = '.md', extra: dict = None) -> Path:
+    """Save a post as a frontmatter + body source file in posts/.
+
+    extra holds further frontmatter keys to keep (title, tags and date
+    in it are ignored).
+    """
+    POSTS_DIR.mkdir(exist_ok=True)
+    stem = f"{iso_date[:10]}-{slug or slugify(title)}"
+    path = POSTS_DIR / f"{stem}{suffix}"
+    counter = 2
+    while path.exists():
+        path = POSTS_DIR / f"{stem}-{counter}{suffix}"
+        counter += 1
+
+    tags = [t.strip() for t in tags if t.strip()]
+    # Values are JSON, which the frontmatter parser reads back unchanged
+    extra_lines = ''.join(f"{key}: {json.dumps(value, ensure_ascii=False)}\n"
+                          for key, value in (extra or {}).items()
+                          if key not in ('title', 'tags', 'date') and FRONTMATTER_KEY_PATTERN.match(f"{key}:"))
+    atomic_write(
+        path,
+        "---\n"
+        f"title: {json.dumps(title, ensure_ascii=False)}\n"
+        f"tags: {json.dumps(tags, ensure_ascii=False)}\n"
+        f"date: {iso_date}\n"
+        f"{extra_lines}"
+        "---\n\n"
+        f"{body.strip()}\n"
+    )
+    return path
+
+
+def parse_post_source(path: Path, text: str) -> dict:
+    """Parse a posts/ source file into a post record.
+
+    Record fields: source, slug, title, date (ISO string), tags, guid, body,
+    format, and excerpt when the frontmatter sets one.
+    """
+    frontmatter, body = parse_frontmatter(text)
+
+    title = str(frontmatter.get('title') or path.stem.replace('-', ' ').title())
+    tags = frontmatter.get('tags', [])
+
+    # Date: frontmatter, then the YYYY-MM-DD file name prefix, then mtime
+    iso_date = normalize_date(frontmatter.get('date'))
+    if not iso_date:
+        prefix = re.match(r'(\d{4}-\d{2}-\d{2})', path.name)
+        if prefix:
+            iso_date = prefix.group(1)
+        else:
+            iso_date = datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+
+    return {
+        'source': path.as_posix(),
+        'slug': path.stem,
+        'title': title,
+        'date': iso_date,
+        'tags': tags,
+        'guid': str(frontmatter.get('guid') or f"{SITE_URL}/{post_page_url(path.stem)}"),
+        'excerpt': str(frontmatter.get('excerpt') or frontmatter.get('description') or ''),
+        'body': body,
+        'format': 'html' if path.suffix == '.html' else 'markdown',
+    }
+
+
+def post_summary(content_html: str, excerpt: str = '') -> dict:
+    """Word count, reading time and excerpt of a post's rendered body.
+
+    The excerpt is the first paragraphs' text cut at EXCERPT_WORDS, unless
+    the frontmatter provides one.
+    """
+    words = html_to_text(content_html).split()
+    if not excerpt:
+        lead = []
+        for paragraph in re.findall(r'<p\b[^>]*>(.*?)</p>', content_html, re.DOTALL):
+            lead.extend(html_to_text(paragraph).split())
+            if len(lead) >= EXCERPT_WORDS:
+                break
+        lead = lead or words
+        excerpt = ' '.join(lead[:EXCERPT_WORDS]) + ('…' if len(lead) > EXCERPT_WORDS else '')
+    return {
+        'word_count': len(words),
+        'reading_time': max(1, -(-len(words) // READING_WORDS_PER_MINUTE)),
+        'excerpt': excerpt,
+    }
+
+
+def render_article(post: dict, content: str, read_more: str = '') -> str:
+    """Fill POST_TEMPLATE for a post record with the given body html."""
+    return POST_TEMPLATE.format(
+        title=escape(post['title']),
+        date_display=format_date_display(post['date']),
+        iso_date=post['date'],
+        slug=post['slug'],
+        content=content,
+        read_more=read_more,
+        tags_html=create_tags_html(post['tags'])
+    )
+
+
+def render_post_fragment(post: dict) -> tuple[str, dict]:
+    """Render a post record into its full <article> fragment.
+
+    Returns the fragment and the local images it references ({src: [mtime_ns, size, hash]}).
+    """
+    if post['format'] == 'html':
+        html_content = post['body']
+        # HTML sources (like the imported legacy posts) get the same highlighting
+        if HAS_PYGMENTS and '<pre><code class="language-' in html_content:
+            html_content = highlight_code_blocks(html_content)
+    else:
+        html_content = convert_markdown(post['body'])
+    html_content, images = optimize_images(html_content)
+    return render_article(post, html_content), images
+
+
+def render_listing_fragment(post: dict, html: str, summary: dict, version: str) -> str:
+    """The <article> listings show: the excerpt and a link to the rest, or the whole post if it is that short.
+
+    version fingerprints the post's body.html fragment for the read-more link.
+    """
+    if summary['word_count'] <= EXCERPT_WORDS and not post['excerpt']:
+        return html
+    read_more = READ_MORE_TEMPLATE.format(slug=post['slug'], words=summary['word_count'],
+                                          minutes=summary['reading_time'], version=version)
+    return render_article(post, f"<p>{escape(summary['excerpt'])}</p>", read_more)
+
+
+def load_manifest() -> dict:
+    """Load the build manifest, or an empty one if missing or outdated."""
+    empty = {'version': MANIFEST_VERSION, 'renderer': None, 'posts': {}}
+    if not MANIFEST_PATH.exists():
+        return empty
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except (json.JSONDecodeError, OSError):
+        return empty
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty
+    return manifest
+
+
+def save_manifest(manifest: dict):
+    """Persist the build manifest."""
+    BUILD_DIR.mkdir(exist_ok=True)
+    write_if_changed(MANIFEST_PATH, json.dumps(manifest, indent=1, sort_keys=True))
+
+
+def source_paths() -> list[Path]:
+    """All post sources, in a stable order."""
+    if not POSTS_DIR.exists():
+        return []
+    return sorted(list(POSTS_DIR.glob('*.md')) + list(POSTS_DIR.glob('*.html')))
+
+
+def parse_legacy_article(article: str) -> dict | None:
+    """Pull title, date, tags and body out of a POST_TEMPLATE-style <article>."""
+    date_match = re.search(r'data-date="([^"]*)"', article[:article.find('>')])
+    title_match = re.search(r'<h[23][^>]*>(.*?)</h[23]>', article, re.DOTALL)
+    body_match = re.search(r'<div class="[^"]*post-content[^"]*">', article)
+    fade = article.rfind('<div class="post-fade"></div>')
+    if not (date_match and title_match and body_match) or fade < body_match.end():
+        return None
+
+    return {
+        'title': unescape(title_match.group(1).strip()),
+        'date': date_match.group(1),
+        'tags': re.findall(r'>#([^<]+)</(?:span|a)>', article[fade:]),
+        'body': article[body_match.end():fade].strip(),
+    }
+
+
+def migrate_index(html: str) -> str | None:
+    """One-time conversion of a hand-maintained index.html to the generated layout.
+
+    Dated articles that already have a source in posts/ are dropped (the build
+    regenerates them); the rest are imported as posts/*.html sources. Undated
+    articles (like the genesis post) stay as static content below the markers.
+    """
+    start = html.find(MAIN_MARKER)
+    end = html.find('</main>', start)
+    if start == -1 or end == -1:
+        print("❌ Error: Could not find <main> in index.html")
+        print("   Looking for: " + MAIN_MARKER)
+        return None
+
+    known_titles = set()
+    for path in source_paths():
+        frontmatter, _ = parse_frontmatter(path.read_text(encoding='utf-8'))
+        known_titles.add(frontmatter.get('title', ''))
+
+    static = []
+    imported = 0
+    inner = html[start + len(MAIN_MARKER):end]
+    for match in ARTICLE_PATTERN.finditer(inner):
+        article = match.group(0)
+        if 'data-date="' not in article[:article.find('>')]:
+            static.append(article)
+            continue
+        post = parse_legacy_article(article)
+        if post is None:
+            static.append(article)
+            continue
+        if post['title'] in known_titles:
+            continue
+        write_post_source(post['title'], post['body'], post['tags'], post['date'], suffix='.html')
+        known_titles.add(post['title'])
+        imported += 1
+
+    if imported:
+        print(f"   📥 Imported {imported} existing post(s) from index.html into posts/")
+
+    region = f"\n{POSTS_BEGIN}\n{POSTS_END}\n" + '\n'.join(static) + "\n        "
+    return html[:start + len(MAIN_MARKER)] + region + html[end:]
+
+
+def render_source(key: str, text: str) -> dict:
+    """Parse and render one post source into its manifest entry (minus stat fields)."""
+    with span('render_source', source=key):
+        post = parse_post_source(Path(key), text)
+        html, images = render_post_fragment(post)
+    summary = post_summary(fragment_body(html), post['excerpt'])
+    version = hash_bytes(fragment_body(html).strip().encode('utf-8'))[:8]
+    entry = {key: post[key] for key in ('source', 'slug', 'title', 'date', 'tags', 'guid')}
+    # Classes the post's own markup uses, for the stylesheet compiler
+    classes = sorted(set(' '.join(re.findall(r'class="([^"]*)"', fragment_body(html))).split()))
+    entry.update(summary, html=html, listing=render_listing_fragment(post, html, summary, version),
+                 body_version=version, images=images, classes=classes)
+    return entry
+
+
+def _render_chunk(chunk: list[tuple[str, str]], use_cache: bool, trace: bool) -> tuple[list[dict], int, list]:
+    """Process-pool worker: render a chunk of (key, text) sources.
+
+    Returns the results, render cache hits and (when tracing) the worker's spans.
+    """
+    global RENDER_CACHE_ENABLED, _render_cache_prunes, _trace_events
+    RENDER_CACHE_ENABLED = use_cache
+    _render_cache_prunes = False
+    _trace_events = [] if trace else None
+    hits_before = _render_cache_stats['hits']
+    results = [render_source(key, text) for key, text in chunk]
+    return results, _render_cache_stats['hits'] - hits_before, _trace_events or []
+
+
+def chunk_sources(pending: list[tuple[str, str]], jobs: int) -> list[list[tuple[str, str]]]:
+    """Group sources into chunks big enough to be worth a round trip to a worker."""
+    total = sum(len(text) for _, text in pending)
+    target = max(BUILD_CHUNK_MIN_BYTES, total // (jobs * 4))
+    chunks, current, size = [], [], 0
+    for item in pending:
+        current.append(item)
+        size += len(item[1])
+        if size >= target:
+            chunks.append(current)
+            current, size = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def render_sources(pending: list[tuple[str, str]], jobs: int = 1) -> list[dict]:
+    """Render sources serially or fanned out over a process pool."""
+    if jobs == 1 or len(pending) < 2:
+        return [render_source(key, text) for key, text in pending]
+
+    chunks = chunk_sources(pending, jobs)
+    if len(chunks) < 2:
+        return [render_source(key, text) for key, text in pending]
+
+    global _render_cache_size
+    results = []
+    ProcessPoolExecutor = lazy_import('concurrent.futures').ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as pool:
+        futures = [pool.submit(_render_chunk, chunk, RENDER_CACHE_ENABLED, _trace_events is not None)
+                   for chunk in chunks]
+        for future in futures:
+            chunk_results, hits, events = future.result()
+            results.extend(chunk_results)
+            _render_cache_stats['hits'] += hits
+            if _trace_events is not None:
+                _trace_events.extend(events)
+    # Workers only add to the render cache; bring it back under budget here
+    if RENDER_CACHE_ENABLED:
+        _render_cache_size = None
+        if sum(e['size'] for e in render_cache_entries()) > RENDER_CACHE_MAX_BYTES:
+            prune_render_cache(RENDER_CACHE_MAX_BYTES)
+    print(f"   ⚙️  Rendered {len(pending)} post(s) in {len(chunks)} chunk(s) on {min(jobs, len(chunks))} worker(s)")
+    return results
+
+
+def listing_url(base: str, page: int) -> str:
+    """Site-relative URL of archive page N of a listing (page 0 is base, its front page)."""
+    return f"{base}page/{page}/" if page else base
+
+
+def paginate(posts: list[dict]) -> list[tuple[int, list[dict]]]:
+    """Split posts (newest first) into (page number, posts) pairs.
+
+    Page 0 holds the newest POSTS_PER_PAGE posts; the rest fill archive pages
+    numbered from the oldest, so a new post only changes page 0 and the
+    newest archive page instead of shifting every page.
+    """
+    rest = posts[POSTS_PER_PAGE:][::-1]
+    archive = [rest[i:i + POSTS_PER_PAGE][::-1] for i in range(0, len(rest), POSTS_PER_PAGE)]
+    return [(0, posts[:POSTS_PER_PAGE])] + list(enumerate(archive, 1))
+
+
+def render_listing(posts: list[dict], base: str = '', heading: str = '') -> list[tuple[str, int, str]]:
+    """Split posts into pages (see paginate); returns (url, number, region html) per page."""
+    pages = paginate(posts)
+    newest = len(pages) - 1
+    regions = []
+    for number, chunk in pages:
+        note = f"page {number}" if number else f"{len(posts)} posts"
+        parts = [PAGE_HEADING_TEMPLATE.format(heading=heading, note=note)] if heading else []
+        parts.extend(entry['listing'] for entry in chunk)
+        if newest:
+            newer = older = ''
+            if number:
+                href = listing_url(base, number + 1 if number < newest else 0) or './'
+                newer = PAGE_LINK_TEMPLATE.format(href=href, label='← Newer')
+            if number != 1:
+                older = PAGE_LINK_TEMPLATE.format(href=listing_url(base, number - 1 if number else newest),
+                                                  label='Older →')
+            parts.append(PAGINATION_TEMPLATE.format(newer=newer, older=older,
+                                                    page=f"page {number}" if number else "latest"))
+        regions.append((listing_url(base, number), number, ''.join(parts)))
+    return regions
+
+
+def relocate_html(html: str, prefix: str) -> str:
+    """Prefix relative URLs so a page can live below the site root."""
+    html = RELATIVE_URL_PATTERN.sub(lambda m: f'{m.group(1)}="{prefix}{m.group(2)}"', html)
+    html = SRCSET_PATTERN.sub(lambda m: 'srcset="' + ', '.join(
+        candidate if re.match(r'[a-zA-Z][a-zA-Z0-9+.-]*:|/', candidate) else prefix + candidate
+        for candidate in m.group(1).split(', ')
+    ) + '"', html)
+    # Inlined CSS (critical rules, @font-face) refers to assets/ too
+    html = INLINE_STYLE_PATTERN.sub(lambda m: m.group(0).replace('url(assets/', f'url({prefix}assets/'), html)
+    # The header's [index] link points at "#" on the front page
+    return html.replace('href="#"', f'href="{prefix}"')
+
+
+def render_page(shell: str, region: str, url: str, title: str = None) -> str:
+    """Place a posts region into the layout shell for the page at url."""
+    start = shell.index(POSTS_BEGIN) + len(POSTS_BEGIN)
+    end = shell.index(POSTS_END, start)
+    html = shell[:start] + "\n" + region + shell[end:]
+    if url:
+        html = relocate_html(html, '../' * url.count('/'))
+    if title:
+        html = re.sub(r'<title>[^<]*</title>', f'<title>{escape(title)}</title>', html, count=1)
+    return html
+
+
+def build_pages(shell: str, ordered: list[dict], previous: dict[str, str] = None) -> tuple[dict[str, str], dict[str, str]]:
+    """Render the front page, archive pages and per-tag pages whose inputs changed.
+
+    A page's input hash covers the shell, its title and its posts region;
+    previous maps paths to the hashes of the last build. Returns ({path: html}
+    of pages to write, {path: input hash} of every page).
+    """
+    shell_hash = hash_bytes(shell.encode('utf-8'))
+    previous = previous or {}
+    pages, inputs = {}, {}
+
+    def add(url: str, region: str, title: str = None):
+        path = url + "index.html"
+        inputs[path] = hash_bytes('\0'.join((shell_hash, url, title or '', region)).encode('utf-8'))
+        if previous.get(path) != inputs[path] or not Path(path).exists():
+            pages[path] = render_page(shell, region, url, title)
+
+    for url, number, region in render_listing(ordered):
+        add(url, region, f"Archive page {number} · {SITE_TITLE}" if url else None)
+
+    by_tag = {}
+    for entry in ordered:
+        for tag in entry['tags']:
+            by_tag.setdefault(slugify(tag), (tag, []))[1].append(entry)
+
+    for tag_slug, (tag, tagged) in sorted(by_tag.items()):
+        base = f"tags/{tag_slug}/"
+        for url, number, region in render_listing(tagged, base, heading=f"#{escape(tag)}"):
+            add(url, region, f"#{tag} (page {number}) · {SITE_TITLE}" if number else f"#{tag} · {SITE_TITLE}")
+    return pages, inputs
+
+
+def render_post_page(shell: str, entry: dict, related: list[dict] = ()) -> str:
+    """A post's permalink page: its article, fully expanded, and links to related posts in the layout shell."""
+    article = entry['html'].replace('prose post-content"', 'prose post-content expanded"', 1)
+    if related:
+        article += RELATED_TEMPLATE.format(links='\n'.join(
+            RELATED_LINK_TEMPLATE.format(slug=other['slug'], title=escape(other['title']), date=other['date'][:10])
+            for other in related))
+    url = post_page_url(entry['slug'])
+    html = render_page(shell, article + POST_PAGE_FOOTER_TEMPLATE, url, f"{entry['title']} · {SITE_TITLE}")
+    return html.replace('</title>', f'</title>\n    <link rel="canonical" href="{SITE_URL}/{url}">', 1)
+
+
+def build_post_pages(shell: str, ordered: list[dict], previous: dict[str, str], reuse: set[str],
+                     related: dict[str, list] = None) -> tuple[dict[str, str], dict[str, str]]:
+    """Render permalink pages and body fragments for posts not in reuse (source keys).
+
+    post/<slug>/body.html is the bare rendered body, fetched by listings to
+    expand a post and read by the feeds. related maps sources to their
+    [[source, score], ...] list. Returns ({path: html} to write, {path: hash}
+    of pages kept as they are).
+    """
+    by_source = {entry['source']: entry for entry in ordered}
+    related = related or {}
+    # Static articles below the markers belong to the listings only
+    end = shell.index(POSTS_END) + len(POSTS_END)
+    shell = shell[:end] + "\n        " + shell[shell.index('</main>', end):]
+
+    pages, kept = {}, {}
+    for entry in ordered:
+        path = post_page_url(entry['slug']) + "index.html"
+        body = post_page_url(entry['slug']) + "body.html"
+        if entry['source'] in reuse and path in previous and body in previous and Path(path).exists():
+            kept[path], kept[body] = previous[path], previous[body]
+        else:
+            pages[path] = render_post_page(shell, entry, [by_source[source] for source, _ in
+                                                          related.get(entry['source'], ())])
+            pages[body] = fragment_body(entry['html']).strip() + "\n"
+    return pages, kept
+
+
+def write_pages(pages: dict[str, str], previous: dict[str, str],
+                kept: dict[str, str] = None) -> tuple[dict[str, str], list[str]]:
+    """Write pages whose content hash changed and delete pages no longer generated.
+
+    kept maps pages that weren't regenerated to their recorded hash. Returns
+    the new {path: hash} map and the list of paths written.
+    """
+    hashes = dict(kept or {})
+    written = []
+    for path, html in pages.items():
+        digest = hash_bytes(html.encode('utf-8'))
+        hashes[path] = digest
+        if previous.get(path) == digest and Path(path).exists():
+            continue
+        atomic_write(Path(path), html)
+        written.append(path)
+
+    for path in set(previous) - set(hashes):
+        stale = Path(path)
+        stale.unlink(missing_ok=True)
+        # Drop now-empty page/, tags/ and post/ directories
+        for parent in stale.parents:
+            if parent == Path('.') or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+    return hashes, written
+
+
+def is_site_dir() -> bool:
+    """Whether this is a site directory: it has layout.html (or an index.html to split it from)."""
+    if LAYOUT_PATH.exists() or Path("index.html").exists():
+        return True
+    print("❌ Error: layout.html not found. Run this from your wf-ai-site directory.")
+    return False
+
+
+def load_layout() -> str | None:
+    """The page shell, from layout.html.
+
+    On first run layout.html is split off the hand-maintained index.html
+    (importing its posts), since index.html itself becomes minified output.
+    """
+    if LAYOUT_PATH.exists():
+        return LAYOUT_PATH.read_text(encoding='utf-8')
+
+    if not is_site_dir():
+        return None
+    index_path = Path("index.html")
+
+    html = index_path.read_text(encoding='utf-8')
+    if POSTS_BEGIN not in html:
+        html = migrate_index(html)
+        if html is None:
+            return None
+    start = html.index(POSTS_BEGIN) + len(POSTS_BEGIN)
+    end = html.index(POSTS_END, start)
+    html = html[:start] + "\n" + html[end:]
+    atomic_write(LAYOUT_PATH, html)
+    print(f"📐 Created {LAYOUT_PATH} from index.html - edit the page shell there from now on")
+    return html
+
+
+@site_locked
+def build_site(force: bool = False, jobs: int = 1) -> bool:
+    """Re-render changed posts and splice all post fragments into the layout."""
+    timings = {}
+    started = time.perf_counter()
+
+    html = load_layout()
+    if html is None:
+        return False
+
+    manifest = load_manifest()
+    fingerprint = renderer_fingerprint()
+    previous = {} if force or manifest.get('renderer') != fingerprint else manifest['posts']
+
+    # Stage 1: find sources whose content changed
+    entries = {}
+    pending = []
+    stats = {}
+    for path in source_paths():
+        key = path.as_posix()
+        stat = path.stat()
+        entry = previous.get(key)
+
+        # Unchanged size + mtime: trust the recorded hash without reading the file
+        if (entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+                and images_unchanged(entry)):
+            entries[key] = entry
+            continue
+
+        raw = path.read_bytes()
+        digest = hash_bytes(raw)
+        if entry and entry['hash'] == digest and images_unchanged(entry):
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            entries[key] = entry
+            continue
+
+        pending.append((key, raw.decode('utf-8')))
+        stats[key] = {'hash': digest, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    timings['scan'] = time.perf_counter() - started
+    record_span('build.scan', started, timings['scan'], sources=len(entries) + len(pending), changed=len(pending))
+
+    # Stage 2: render them
+    stage = time.perf_counter()
+    for result in render_sources(pending, jobs):
+        result.update(stats[result['source']])
+        entries[result['source']] = result
+    rendered = len(pending)
+    timings['render'] = time.perf_counter() - stage
+    record_span('build.render', stage, timings['render'], posts=rendered, jobs=jobs)
+
+    # Stage 3: assemble the front page, archive and tag pages, newest first,
+    # plus permalink pages for posts that were re-rendered (or all, if the shell changed)
+    stage = time.perf_counter()
+    removed = len(set(previous) - set(entries))
+    ordered = sorted(entries.values(), key=lambda e: (e['date'], e['title']), reverse=True)
+    stylesheet = build_stylesheet(html, force, sorted({name for entry in ordered for name in entry['classes']}))
+    if stylesheet:
+        html = link_stylesheet(html, stylesheet)
+        faces, vendored = build_fonts(ordered, html, force)
+        html = inline_critical_css(html, stylesheet, faces, vendored, ordered[0]['listing'] if ordered else '')
+    html = fingerprint_shell(html)
+    shell_hash = hash_bytes(html.encode('utf-8'))
+    docs, retokenized = search_docs(ordered, fingerprint)
+    related, relinked = build_related(ordered, docs, force)
+    reuse = set() if manifest.get('shell') != shell_hash else set(entries) - {key for key, _ in pending} - relinked
+    post_pages, kept = build_post_pages(html, ordered, manifest.get('pages', {}), reuse, related)
+    # Listing pages whose shell, title and posts region are unchanged are kept as they are
+    listings, inputs = build_pages(html, ordered, manifest.get('inputs', {}))
+    kept.update((path, manifest['pages'][path]) for path in inputs
+                if path not in listings and path in manifest.get('pages', {}))
+    pages = {path: minify_html(page) for path, page in listings.items()}
+    pages.update((path, minify_html(page)) for path, page in post_pages.items())
+    timings['assemble'] = time.perf_counter() - stage
+    record_span('build.assemble', stage, timings['assemble'], pages=len(pages),
+                bytes=sum(len(page) for page in pages.values()))
+
+    # Stage 4: write outputs whose content changed
+    stage = time.perf_counter()
+    page_hashes, written = write_pages(pages, manifest.get('pages', {}), kept)
+    save_manifest({'version': MANIFEST_VERSION, 'renderer': fingerprint, 'shell': shell_hash,
+                   'posts': entries, 'pages': page_hashes, 'inputs': inputs})
+    save_post_index(ordered, {listing_url('', number) + "index.html": [entry['slug'] for entry in chunk]
+                              for number, chunk in paginate(ordered)})
+    build_service_worker(html, ordered)
+    timings['write'] = time.perf_counter() - stage
+    record_span('build.write', stage, timings['write'], pages_written=len(written),
+                bytes_written=sum(len(pages[path]) for path in written))
+
+    # Stage 5: search index
+    stage = time.perf_counter()
+    build_search_index(ordered, docs, retokenized)
+    timings['search'] = time.perf_counter() - stage
+    record_span('build.search', stage, timings['search'])
+    record_span('build_site', started, time.perf_counter() - started, posts=len(entries), rendered=rendered,
+                render_cache_hits=_render_cache_stats['hits'])
+
+    print(f"🔨 Built {len(entries)} post(s): {rendered} rendered, "
+          f"{len(entries) - rendered} cached, {removed} removed")
+    if _render_cache_stats['hits']:
+        print(f"   🗄️  {_render_cache_stats['hits']} render(s) served from the render cache")
+    if written:
+        print(f"   📝 {len(written)} of {len(page_hashes)} page(s) updated")
+    print("   ⏱️  " + " · ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in timings.items())
+          + f" · total {(time.perf_counter() - started) * 1000:.0f}ms")
+    return True
+
+# =============================================================================
+# Image Pipeline
+# =============================================================================
+#
+# Local <img src="images/..."> tags get resized variants (IMAGE_WIDTHS, never
+# upscaled) plus WebP copies in images/resized/, and are rewritten into a
+# <picture> with srcset/sizes, explicit width/height, loading="lazy" and
+# decoding="async". Variants are keyed by the source image's content hash,
+# so untouched images are never reprocessed.
+
+IMAGES_DIR = Path("images")
+IMAGE_VARIANTS_DIR = IMAGES_DIR / "resized"
+IMAGE_CACHE_DIR = BUILD_DIR / "cache" / "images"
+IMAGE_WIDTHS = (480, 960, 1440)
+IMAGE_SIZES = "(min-width: 42rem) 42rem, 100vw"  # posts are max-w-2xl
+IMAGE_PIPELINE_VERSION = 2
+
+IMG_TAG_PATTERN = re.compile(r'<img\s+([^>]*?)\s*/?>', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)="([^"]*)"')
+
+_image_digests = {}
+
+
+def image_dimensions(data: bytes) -> tuple[int, int] | None:
+    """Width and height from a PNG, GIF or JPEG header (no Pillow needed)."""
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return int.from_bytes(data[6:8], 'little'), int.from_bytes(data[8:10], 'little')
+    if data[:2] == b'\xff\xd8':
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            length = int.from_bytes(data[i + 2:i + 4], 'big')
+            # SOF0..SOF15 except DHT (C4), JPG (C8) and DAC (CC) carry the frame size
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                return int.from_bytes(data[i + 7:i + 9], 'big'), int.from_bytes(data[i + 5:i + 7], 'big')
+            i += 2 + length
+    return None
+
+
+def image_digest(path: Path) -> tuple[int, int, str]:
+    """(mtime_ns, size, content hash) of an image, memoized per process."""
+    stat = path.stat()
+    cached = _image_digests.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached
+    cached = (stat.st_mtime_ns, stat.st_size, hash_bytes(path.read_bytes()))
+    _image_digests[path] = cached
+    return cached
+
+
+def images_unchanged(entry: dict) -> bool:
+    """True if every image a manifest entry was rendered with is still the same."""
+    for src, (mtime_ns, size, digest) in entry.get('images', {}).items():
+        path = Path(src)
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size) and image_digest(path)[2] != digest:
+            return False
+    return True
+
+
+def process_image(path: Path, digest: str) -> dict:
+    """Generate variants for an image once per content hash; returns its metadata."""
+    meta_path = IMAGE_CACHE_DIR / f"{digest}.json"
+    try:
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        pass
+
+    started = time.perf_counter()
+    dimensions = image_dimensions(path.read_bytes())
+    meta = {'width': None, 'height': None, 'srcset': [], 'webp': []}
+    if dimensions:
+        meta['width'], meta['height'] = dimensions
+
+    suffix = path.suffix.lower()
+    if HAS_PIL and suffix in ('.jpg', '.jpeg', '.png', '.webp'):
+        Image = lazy_import('PIL.Image')
+        features = lazy_import('PIL.features')
+        IMAGE_VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+        with Image.open(path) as image:
+            width, height = image.size
+            meta['width'], meta['height'] = width, height
+            widths = [w for w in IMAGE_WIDTHS if w < width] + [width]
+            for w in widths:
+                resized = image if w == width else image.resize((w, round(height * w / width)), Image.LANCZOS)
+                stem = f"{path.stem}-{digest[:8]}-{w}"
+                if w < width:
+                    out = IMAGE_VARIANTS_DIR / f"{stem}{suffix}"
+                    with atomic_open(out, 'wb') as f:
+                        if suffix in ('.jpg', '.jpeg'):
+                            resized.convert('RGB').save(f, 'JPEG', quality=82, optimize=True, progressive=True)
+                        else:
+                            resized.save(f, Image.registered_extensions()[suffix], optimize=True)
+                    meta['srcset'].append([out.as_posix(), w])
+                if suffix != '.webp' and features.check('webp'):
+                    out = IMAGE_VARIANTS_DIR / f"{stem}.webp"
+                    mode = 'RGBA' if resized.mode in ('RGBA', 'LA', 'P') else 'RGB'
+                    with atomic_open(out, 'wb') as f:
+                        resized.convert(mode).save(f, 'WEBP', quality=80, method=6)
+                    meta['webp'].append([out.as_posix(), w])
+        meta['srcset'].append([path.as_posix(), width])
+
+    atomic_write(meta_path, json.dumps(meta), sync=False)
+    record_span('process_image', started, time.perf_counter() - started, src=path.as_posix(),
+                variants=len(meta['srcset']) + len(meta['webp']))
+    return meta
+
+
+def optimize_images(html: str) -> tuple[str, dict]:
+    """Rewrite local <img> tags for responsive, lazy loading.
+
+    Returns the new HTML and {src: [mtime_ns, size, hash]} for the images used.
+    """
+    used = {}
+
+    def rewrite(match):
+        attrs = dict(ATTR_PATTERN.findall(match.group(1)))
+        # Leave tags we can't round-trip (single-quoted/bare attributes) or already responsive
+        if 'srcset' in attrs or ATTR_PATTERN.sub('', match.group(1)).strip():
+            return match.group(0)
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+
+        src = attrs.get('src', '')
+        path = Path(src.removeprefix('./').removeprefix('/'))
+        sources = ''
+        if path.parts[:1] == (IMAGES_DIR.name,) and path.is_file():
+            mtime_ns, size, digest = image_digest(path)
+            used[path.as_posix()] = [mtime_ns, size, digest]
+            meta = process_image(path, digest)
+            # Variants have the hash in their names; the original gets it as ?v=
+            original = f"{path.as_posix()}?v={digest[:8]}"
+            attrs['src'] = original
+            if meta['width'] and 'width' not in attrs:
+                attrs['width'], attrs['height'] = str(meta['width']), str(meta['height'])
+            if len(meta['srcset']) > 1:
+                attrs['srcset'] = ', '.join(f"{original if url == path.as_posix() else url} {w}w"
+                                            for url, w in meta['srcset'])
+                attrs['sizes'] = IMAGE_SIZES
+            if meta['webp']:
+                webp = ', '.join(f"{url} {w}w" for url, w in meta['webp'])
+                sources = f'<source type="image/webp" srcset="{webp}" sizes="{IMAGE_SIZES}">'
+
+        img = '<img ' + ' '.join(f'{name}="{value}"' for name, value in attrs.items()) + '>'
+        return f'<picture>{sources}{img}</picture>' if sources else img
+
+    with span('optimize_images', bytes=len(html)) as s:
+        html = IMG_TAG_PATTERN.sub(rewrite, html)
+        s.set(images=len(used))
+    return html, used
+
+
+# =============================================================================
+# Post Index
+# =============================================================================
+#
+# .site/posts.json holds one record per post (slug, title, ISO date, tags,
+# source path, derived fields and the archive page listing it), newest first.
+# Readers (list, rss, ...) load it instead of scanning HTML; rendered bodies
+# are read from post/<slug>/body.html.
+
+_post_index_cache = None
+_post_slug_map = None
+
+
+def locate_articles(html: bytes) -> dict[str, dict]:
+    """Find byte offsets of each generated <article id="..."> and its body."""
+    offsets = {}
+    body_open = b'post-content">'
+    fade = b'<div class="post-fade"></div>'
+    for match in re.finditer(rb'<article id="([^"]+)"', html):
+        start = match.start()
+        end = html.find(b'</article>', start)
+        if end == -1:
+            break
+        end += len(b'</article>')
+        content_start = html.find(body_open, start, end)
+        content_end = html.rfind(fade, start, end)
+        if content_start == -1 or content_end == -1:
+            continue
+        content_start += len(body_open)
+        offsets[match.group(1).decode('utf-8')] = {
+            'offset': start,
+            'length': end - start,
+            'content_offset': content_start,
+            'content_length': content_end - content_start,
+        }
+    return offsets
+
+
+def archive_page_paths() -> list[Path]:
+    """The front page followed by every numbered archive page on disk."""
+    pages = [Path("index.html")] if Path("index.html").exists() else []
+    pages += sorted(Path("page").glob("*/index.html"), key=lambda p: int(p.parent.name)) \
+        if Path("page").exists() else []
+    return pages
+
+
+def save_post_index(posts: list[dict], pages: dict[str, list[str]]):
+    """Write the post index for posts (newest first) as rendered into the archive pages ({path: slugs})."""
+    global _post_index_cache
+    offsets = {}
+    for page, slugs in pages.items():
+        for slug in slugs:
+            offsets.setdefault(slug, {'page': page})
+
+    records = []
+    for post in posts:
+        record = {key: post[key] for key in ('slug', 'title', 'date', 'tags', 'guid', 'source', 'hash')}
+        record.update({key: post[key] for key in SUMMARY_FIELDS})
+        record.update(offsets.get(post['slug'], {}))
+        records.append(record)
+
+    page_stats = {}
+    for page in pages:
+        stat = Path(page).stat()
+        page_stats[page] = [stat.st_mtime_ns, stat.st_size]
+
+    BUILD_DIR.mkdir(exist_ok=True)
+    write_if_changed(POST_INDEX_PATH, json.dumps({
+        'version': POST_INDEX_VERSION,
+        'pages': page_stats,
+        'posts': records,
+    }, indent=1))
+    _post_index_cache = records
+
+
+@site_locked
+def reindex() -> list[dict]:
+    """Rebuild the post index from posts/ in one pass, without re-rendering.
+
+    Derived fields come from the build manifest; posts it doesn't have yet
+    are summarised from their (cached) Markdown conversion.
+    """
+    if not is_site_dir():
+        return []
+
+    built = load_manifest()['posts']
+    posts = []
+    for path in source_paths():
+        raw = path.read_bytes()
+        post = parse_post_source(path, raw.decode('utf-8'))
+        post['hash'] = hash_bytes(raw)
+        entry = built.get(post['source'])
+        if entry and entry['hash'] == post['hash']:
+            post.update({key: entry[key] for key in SUMMARY_FIELDS})
+        else:
+            content = post['body'] if post['format'] == 'html' else convert_markdown(post['body'])
+            post.update(post_summary(content, post['excerpt']))
+        posts.append(post)
+    posts.sort(key=lambda p: (p['date'], p['title']), reverse=True)
+    save_post_index(posts, {page.as_posix(): list(locate_articles(page.read_bytes())) for page in archive_page_paths()})
+
+    missing = sum(1 for p in _post_index_cache if 'page' not in p)
+    print(f"🗂️  Indexed {len(posts)} post(s)")
+    if missing:
+        print(f"   ⚠️  {missing} post(s) not rendered yet - run 'python manager.py build'")
+    return _post_index_cache
+
+
+def load_post_index() -> list[dict]:
+    """Return post records, newest first, rebuilding the index if it is stale."""
+    global _post_index_cache
+    if _post_index_cache is not None:
+        return _post_index_cache
+
+    try:
+        data = json.loads(POST_INDEX_PATH.read_text(encoding='utf-8'))
+        fresh = data.get('version') == POST_INDEX_VERSION
+        for page, (mtime_ns, size) in data['pages'].items():
+            stat = Path(page).stat()
+            if not fresh or stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                fresh = False
+                break
+        if fresh:
+            _post_index_cache = data['posts']
+            return _post_index_cache
+    except (OSError, ValueError, KeyError):
+        pass
+
+    return reindex()
+
+
+def find_post(slug: str) -> dict | None:
+    """Look up a single post record by slug."""
+    global _post_slug_map
+    posts = load_post_index()
+    if _post_slug_map is None or _post_slug_map[0] is not posts:
+        _post_slug_map = (posts, {post['slug']: post for post in posts})
+    return _post_slug_map[1].get(slug)
+
+
+def read_post_html(post: dict) -> str:
+    """Read a post's rendered body from its post/<slug>/body.html fragment ('' if it is missing)."""
+    path = Path(post_page_url(post['slug'])) / "body.html"
+    try:
+        return path.read_text(encoding='utf-8').strip()
+    except OSError:
+        print(f"⚠️  {path.as_posix()} is missing - run 'python manager.py build' (its body is left empty)")
+        return ''
+
+
+# =============================================================================
+# Render Cache
+# =============================================================================
+#
+# Rendered Markdown is cached on disk under .site/cache/render/, keyed by a
+# hash of the source, the extension config and RENDERER_VERSION; highlighted
+# code blocks share the directory, keyed by language and code. A cache hit
+# bumps the file's mtime, so eviction (oldest mtime first) is LRU.
+
+RENDER_CACHE_DIR = BUILD_DIR / "cache" / "render"
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RENDER_CACHE_ENABLED = True
+
+_render_cache_stats = {'hits': 0, 'misses': 0}
+_render_cache_size = None
+_render_cache_prunes = True  # False in `build --jobs` workers: the parent holds the site lock and prunes
+
+
+def render_cache_key(raw_content: str) -> str:
+    """Cache key for a Markdown source under the current renderer config."""
+    renderer = package_fingerprint('markdown') if HAS_MARKDOWN else 'plain'
+    highlighter = f"{HIGHLIGHT_VERSION}:{package_fingerprint('pygments')}" if HAS_PYGMENTS else 'off'
+    config = f"{RENDERER_VERSION}\0{renderer}\0{MARKDOWN_EXTENSIONS}\0{highlighter}\0"
+    return hash_bytes((config + raw_content).encode('utf-8'))
+
+
+def render_cache_get(key: str) -> str | None:
+    """Return a cached render, or None on a miss."""
+    if not RENDER_CACHE_ENABLED:
+        return None
+    path = RENDER_CACHE_DIR / f"{key}.html"
+    try:
+        html = path.read_text(encoding='utf-8')
+        os.utime(path)
+    except OSError:
+        _render_cache_stats['misses'] += 1
+        return None
+    _render_cache_stats['hits'] += 1
+    return html
+
+
+def render_cache_put(key: str, html: str):
+    """Store a render, evicting least recently used entries over the size limit."""
+    global _render_cache_size
+    if not RENDER_CACHE_ENABLED:
+        return
+    RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    data = html.encode('utf-8')
+    atomic_write(RENDER_CACHE_DIR / f"{key}.html", data, sync=False)
+
+    if _render_cache_size is None:
+        _render_cache_size = sum(e['size'] for e in render_cache_entries())
+    else:
+        _render_cache_size += len(data)
+    if _render_cache_prunes and _render_cache_size > RENDER_CACHE_MAX_BYTES:
+        prune_render_cache(RENDER_CACHE_MAX_BYTES)
+
+
+def render_cache_entries() -> list[dict]:
+    """All cache entries, least recently used first."""
+    if not RENDER_CACHE_DIR.exists():
+        return []
+    entries = []
+    for path in RENDER_CACHE_DIR.glob("*.html"):
+        stat = path.stat()
+        entries.append({'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime})
+    entries.sort(key=lambda e: e['mtime'])
+    return entries
+
+
+@site_locked
+def prune_render_cache(max_bytes: int) -> tuple[int, int]:
+    """Evict LRU entries until the cache fits in max_bytes. Returns (files, bytes) removed."""
+    global _render_cache_size
+    entries = render_cache_entries()
+    total = sum(e['size'] for e in entries)
+    removed = freed = 0
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        entry['path'].unlink(missing_ok=True)
+        total -= entry['size']
+        removed += 1
+        freed += entry['size']
+    _render_cache_size = total
+    return removed, freed
+
+
+def render_cache_stats():
+    """Print render cache size and usage."""
+    entries = render_cache_entries()
+    total = sum(e['size'] for e in entries)
+    print(f"🗄️  Render cache: {RENDER_CACHE_DIR.as_posix()}")
+    print(f"   Entries: {len(entries)}")
+    print(f"   Size:    {total / 1024:.1f} KB of {RENDER_CACHE_MAX_BYTES / (1024 * 1024):.0f} MB")
+    if entries:
+        oldest = datetime.datetime.fromtimestamp(entries[0]['mtime']).strftime("%Y-%m-%d %H:%M")
+        newest = datetime.datetime.fromtimestamp(entries[-1]['mtime']).strftime("%Y-%m-%d %H:%M")
+        print(f"   Used:    {oldest} (oldest) .. {newest} (newest)")
+
+# =============================================================================
+# Search Index
+# =============================================================================
+#
+# A static inverted index for client-side search (search.js). Terms map to
+# (post id, term frequency) postings that search.js ranks with BM25, sharded
+# by the term's first character
+# into search/<shard>.json so the page only fetches the shards a query needs.
+# Per-post term counts are cached by source hash, so a rebuild only
+# re-tokenizes added or changed posts; shards are rewritten only if changed.
+
+SEARCH_DIR = Path("search")
+SEARCH_CACHE_PATH = BUILD_DIR / "search-terms.json"
+SEARCH_BUDGET_BYTES = 256 * 1024  # total gzipped size before we warn
+SEARCH_TITLE_BOOST = 3
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have how i if in into is it its
+just my no not of on or our so than that the their them then there these they this
+to too up us was we what when which who why will with you your
+""".split())
+
+BLOCK_TAG_PATTERN = re.compile(r'</?(?:p|div|br|hr|li|ul|ol|h[1-6]|pre|blockquote|table|tr|td|th|img|figure)\b[^>]*>',
+                               re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'+#.-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase terms worth indexing (no stopwords, no 1-letter noise)."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def html_to_text(html: str) -> str:
+    """Strip tags and decode entities from rendered HTML (block tags separate words)."""
+    return unescape(re.sub(r'<[^>]+>', '', BLOCK_TAG_PATTERN.sub(' ', html)))
+
+
+def fragment_body(fragment: str) -> str:
+    """The rendered body of a POST_TEMPLATE article fragment."""
+    start = fragment.find('post-content">')
+    end = fragment.rfind('<div class="post-fade"></div>')
+    if start == -1 or end == -1:
+        return fragment
+    return fragment[start + len('post-content">'):end]
+
+
+def count_terms(entry: dict) -> dict:
+    """Term frequencies for one manifest entry, with the title boosted."""
+    counts = {}
+    for term in tokenize(html_to_text(fragment_body(entry['html']))):
+        counts[term] = counts.get(term, 0) + 1
+    for term in tokenize(entry['title']) + [slugify(tag) for tag in entry['tags']]:
+        counts[term] = counts.get(term, 0) + SEARCH_TITLE_BOOST
+    return counts
+
+
+def search_docs(ordered: list[dict], fingerprint: str) -> tuple[dict[str, dict], int]:
+    """Term counts per source, re-tokenizing only changed posts. Returns (docs, posts re-tokenized)."""
+    try:
+        cache = json.loads(SEARCH_CACHE_PATH.read_text(encoding='utf-8'))
+        if cache.get('renderer') != fingerprint:
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cached_docs = cache.get('docs', {})
+
+    docs = {}
+    retokenized = 0
+    for entry in ordered:
+        cached = cached_docs.get(entry['source'])
+        if cached and cached['hash'] == entry['hash']:
+            docs[entry['source']] = cached
+            continue
+        counts = count_terms(entry)
+        docs[entry['source']] = {'hash': entry['hash'], 'terms': counts, 'length': sum(counts.values())}
+        retokenized += 1
+
+    BUILD_DIR.mkdir(exist_ok=True)
+    write_if_changed(SEARCH_CACHE_PATH, json.dumps({'renderer': fingerprint, 'docs': docs}))
+    return docs, retokenized
+
+
+def build_search_index(ordered: list[dict], docs: dict[str, dict], retokenized: int = 0,
+                       report: bool = False) -> bool:
+    """Write search/meta.json and the term shards for ordered (newest first) posts."""
+    # Document table, oldest first so ids stay stable as posts are added
+    meta_docs = []
+    shards = {}
+    doc_freq = set()
+    for doc_id, entry in enumerate(reversed(ordered)):
+        doc = docs[entry['source']]
+        meta_docs.append([entry['slug'], entry['title'], entry['date'][:10],
+                          post_page_url(entry['slug']), doc['length']])
+
+        # Postings carry raw term frequencies; search.js applies BM25 with the
+        # document lengths from meta.json, so a new post only touches its own terms
+        for term, tf in doc['terms'].items():
+            shard = term[0] if term[0].isalpha() else '0'
+            shards.setdefault(shard, {}).setdefault(term, []).append([doc_id, tf])
+            doc_freq.add(term)
+
+    SEARCH_DIR.mkdir(exist_ok=True)
+    sizes = {}
+    changed = 0
+    for shard, terms in sorted(shards.items()):
+        path = SEARCH_DIR / f"{shard}.json"
+        data = json.dumps(dict(sorted(terms.items())), separators=(',', ':'))
+        changed += write_if_changed(path, data)
+        sizes[path.name] = data.encode('utf-8')
+
+    meta = json.dumps({'version': 1, 'docs': meta_docs, 'shards': sorted(shards)}, separators=(',', ':'))
+    changed += write_if_changed(SEARCH_DIR / "meta.json", meta)
+    sizes["meta.json"] = meta.encode('utf-8')
+
+    for stale in SEARCH_DIR.glob("*.json"):
+        if stale.name not in sizes:
+            stale.unlink()
+            changed += 1
+
+    raw_total = sum(len(data) for data in sizes.values())
+    gzip = lazy_import('gzip')
+    gzip_total = sum(len(gzip.compress(data, 9)) for data in sizes.values())
+    print(f"🔎 Search index: {len(doc_freq)} terms, {len(sizes) - 1} shard(s), "
+          f"{retokenized} post(s) re-tokenized, {changed} file(s) updated")
+    print(f"   📦 {raw_total / 1024:.1f} KB raw, {gzip_total / 1024:.1f} KB gzipped "
+          f"(budget {SEARCH_BUDGET_BYTES / 1024:.0f} KB)")
+    if report:
+        for name, data in sorted(sizes.items(), key=lambda item: -len(item[1])):
+            print(f"      {name:<12} {len(data) / 1024:7.1f} KB  {len(gzip.compress(data, 9)) / 1024:6.1f} KB gz")
+    if gzip_total > SEARCH_BUDGET_BYTES:
+        print("   ⚠️  Search index is over budget - consider more STOPWORDS or fewer indexed posts")
+        return False
+    return True
+
+
+@site_locked
+def rebuild_search_index(report: bool = True) -> bool:
+    """Rebuild the search index from the current build manifest."""
+    manifest = load_manifest()
+    if not manifest['posts']:
+        print("⚠️  Nothing to index. Run 'python manager.py build' first.")
+        return False
+    ordered = sorted(manifest['posts'].values(), key=lambda e: (e['date'], e['title']), reverse=True)
+    docs, retokenized = search_docs(ordered, manifest['renderer'])
+    return build_search_index(ordered, docs, retokenized, report=report)
+
+
+# =============================================================================
+# Related Posts
+# =============================================================================
+#
+# Each post's search-index term counts (title and tags boosted) become a
+# TF-IDF vector, hashed into RELATED_DIMENSIONS buckets so NumPy can score
+# all posts with dense matrix products; the top RELATED_POSTS cosine matches
+# are linked from the post's page. .site/related.json keeps every post's
+# list with scores plus the IDF weights they were computed with (vectors sit
+# next to it in related-vectors.npy), so a build only vectorizes and scores
+# changed posts against everyone (their rows and columns) and
+# recomputes the few rows that pointed at a changed or removed post. The
+# IDF weights are refreshed - and everything recomputed - once the post
+# count has drifted by RELATED_IDF_DRIFT, or on `build --force`.
+
+RELATED_PATH = BUILD_DIR / "related.json"
+RELATED_VECTORS_PATH = BUILD_DIR / "related-vectors.npy"  # rows in related.json's post order
+RELATED_VERSION = 1
+RELATED_POSTS = 3
+RELATED_MIN_SCORE = 0.1  # cosine similarity below this isn't worth a link
+RELATED_DIMENSIONS = 1024
+RELATED_IDF_DRIFT = 0.1
+RELATED_BLOCK_ROWS = 512  # rows scored per matrix product, bounding memory at n x 512
+
+
+@functools.cache
+def term_bucket(term: str) -> int:
+    """Vector column for a term (stable across runs, unlike hash())."""
+    return lazy_import('zlib').crc32(term.encode('utf-8')) % RELATED_DIMENSIONS
+
+
+def related_vectors(sources: list[str], docs: dict[str, dict], idf: dict[str, float]):
+    """Unit-length hashed TF-IDF vectors, one row per source."""
+    np = lazy_import('numpy')
+    default_idf = max(idf.values(), default=1.0)  # terms new since the IDF was computed
+    rows, cols, tfs, weights = [], [], [], []
+    for row, source in enumerate(sources):
+        for term, tf in docs[source]['terms'].items():
+            rows.append(row)
+            cols.append(term_bucket(term))
+            tfs.append(tf)
+            weights.append(idf.get(term, default_idf))
+    vectors = np.zeros((len(sources), RELATED_DIMENSIONS), dtype=np.float32)
+    np.add.at(vectors, (rows, cols), (1 + np.log(np.array(tfs, dtype=np.float32))) * np.array(weights, np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_related(scores, sources: list[str], rows: list[int]) -> list[list]:
+    """Best [[source, score], ...] per row of scores (rows x all posts), excluding the post itself."""
+    np = lazy_import('numpy')
+    scores[np.arange(len(rows)), rows] = -1
+    k = min(RELATED_POSTS, len(sources) - 1)
+    if k <= 0:
+        return [[] for _ in rows]
+    # Ties (at stored precision) go to the smaller source key, so incremental
+    # updates and full recomputes agree
+    scores = np.round(scores, 4)
+    cutoff = -np.partition(-scores, k - 1, axis=1)[:, k - 1]
+    result = []
+    for i, row in enumerate(scores):
+        columns = np.nonzero(row >= max(cutoff[i], RELATED_MIN_SCORE))[0]
+        pairs = sorted(([sources[col], round(float(row[col]), 4)] for col in columns), key=lambda pair: (-pair[1], pair[0]))
+        result.append(pairs[:k])
+    return result
+
+
+def build_related(ordered: list[dict], docs: dict[str, dict], force: bool = False) -> tuple[dict, set[str]]:
+    """Top related posts per source, updated incrementally.
+
+    Returns ({source: [[source, score], ...]}, sources whose links changed).
+    """
+    if not HAS_NUMPY:
+        return {}, set()
+    try:
+        state = json.loads(RELATED_PATH.read_text(encoding='utf-8'))
+        if state.get('version') != RELATED_VERSION or state.get('dimensions') != RELATED_DIMENSIONS:
+            state = {}
+    except (OSError, ValueError):
+        state = {}
+
+    with span('related', posts=len(ordered)) as s:
+        sources = [entry['source'] for entry in ordered]
+        hashes = {entry['source']: entry['hash'] for entry in ordered}
+        previous = state.get('posts', {})
+        changed = [source for source in sources if previous.get(source, {}).get('hash') != hashes[source]]
+        removed = set(previous) - set(hashes)
+        idf_posts = state.get('idf_posts', 0)
+        full = force or not previous or abs(len(sources) - idf_posts) > RELATED_IDF_DRIFT * idf_posts
+        if not full and not changed and not removed:
+            s.set(rows=0)
+            return {source: previous[source]['related'] for source in sources}, set()
+
+        np = lazy_import('numpy')
+        index = {source: row for row, source in enumerate(sources)}
+        if full:
+            doc_freq = {}
+            for source in sources:
+                for term in docs[source]['terms']:
+                    doc_freq[term] = doc_freq.get(term, 0) + 1
+            n = len(sources)
+            idf = {term: round(float(np.log((1 + n) / (1 + df))) + 1, 4) for term, df in doc_freq.items()}
+            idf_posts = n
+            vectors = related_vectors(sources, docs, idf)
+        else:
+            # Unchanged posts keep their vectors; only changed ones are vectorized
+            idf = state['idf']
+            try:
+                cached = np.load(RELATED_VECTORS_PATH)
+            except (OSError, ValueError):
+                cached = None
+            changed_set = set(changed)
+            reusable = cached is not None and len(cached) == len(previous)
+            vectors = np.zeros((len(sources), RELATED_DIMENSIONS), dtype=np.float32)
+            if reusable:
+                kept = [(row, previous[source]['row']) for row, source in enumerate(sources)
+                        if source not in changed_set]
+                vectors[[new for new, _ in kept]] = cached[[old for _, old in kept]]
+            fresh = [source for source in sources if not reusable or source in changed_set]
+            if fresh:
+                vectors[[index[source] for source in fresh]] = related_vectors(fresh, docs, idf)
+        related = {source: previous[source]['related'] for source in sources if source in previous}
+
+        if full:
+            stale = sources
+        else:
+            # Changed posts: score them against everyone once; that is both
+            # their own rows and their column in everyone else's
+            touched = set(changed) | removed
+            rows = [index[source] for source in changed]
+            scores = vectors[rows] @ vectors.T
+            columns = scores.copy()
+            related.update(zip(changed, top_related(scores, sources, rows)))
+            stale = [source for source in sources if source not in touched
+                     and any(other in touched for other, _ in related[source])]
+            stale_set = set(stale)
+            for source in sources:
+                if source in touched or source in stale_set:
+                    continue
+                merged = related[source] + [[other, round(float(columns[j, index[source]]), 4)]
+                                            for j, other in enumerate(changed)
+                                            if columns[j, index[source]] >= RELATED_MIN_SCORE]
+                related[source] = sorted(merged, key=lambda pair: (-pair[1], pair[0]))[:RELATED_POSTS]
+
+        for start in range(0, len(stale), RELATED_BLOCK_ROWS):
+            block = stale[start:start + RELATED_BLOCK_ROWS]
+            rows = [index[source] for source in block]
+            related.update(zip(block, top_related(vectors[rows] @ vectors.T, sources, rows)))
+
+        # Pages to re-render: different links, or a linked post that changed (its title may have)
+        changed_set = set(changed)
+        relinked = {source for source in sources
+                    if source not in previous or [other for other, _ in related[source]]
+                    != [other for other, _ in previous[source]['related']]
+                    or any(other in changed_set for other, _ in related[source])}
+
+        BUILD_DIR.mkdir(exist_ok=True)
+        with atomic_open(RELATED_VECTORS_PATH, 'wb', sync=False) as f:
+            np.save(f, vectors)
+        atomic_write(RELATED_PATH, json.dumps({
+            'version': RELATED_VERSION, 'dimensions': RELATED_DIMENSIONS, 'idf_posts': idf_posts, 'idf': idf,
+            'posts': {source: {'hash': hashes[source], 'row': index[source], 'related': related[source]}
+                      for source in sources},
+        }, separators=(',', ':')))
+        scored = len(sources) if full else len(changed) + len(stale)
+        s.set(rows=scored, full=full, relinked=len(relinked))
+
+    print(f"🔗 Related posts: {scored} of {len(sources)} row(s) scored{' (full, IDF refreshed)' if full else ''}, "
+          f"{len(relinked)} page(s) relinked")
+    return related, relinked
+
+
+# =============================================================================
+# Stylesheet
+# =============================================================================
+#
+# Replaces the Tailwind Play CDN (which compiles CSS in every visitor's
+# browser) with a static stylesheet compiled at build time. Class-like tokens
+# are scanned from layout.html, the HTML templates above, search.js and the
+# class attributes of rendered posts (recorded per post at render time); the
+# ones that are Tailwind utilities from the theme below are emitted, and
+# `@apply` lines in site.css are expanded from the same utilities. The result
+# is minified into assets/site-<hash>.css and only rebuilt when its inputs
+# change. layout.html links assets/site.css; pages link the hashed file, and
+# assets/ is build output, not committed.
+
+STYLESHEET_SOURCE = Path("site.css")
+ASSETS_DIR = Path("assets")
+STYLESHEET_STATE_PATH = BUILD_DIR / "stylesheet.json"
+STYLESHEET_VERSION = 1
+STYLESHEET_LINK_PATTERN = re.compile(r'href="assets/site(?:-[0-9a-f]{8})?\.css"')
+
+THEME_COLORS = frozenset([
+    'border', 'input', 'ring', 'background', 'foreground',
+    'primary', 'primary-foreground', 'accent', 'accent-foreground',
+    'muted', 'muted-foreground', 'card', 'card-foreground',
+])
+FONT_FAMILIES = {
+    'sans': "'Space Grotesk',sans-serif",
+    'mono': "'JetBrains Mono',monospace",
+}
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'),
+}
+MAX_WIDTHS = {'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem', '3xl': '48rem', 'prose': '65ch'}
+ANIMATIONS = {
+    'fade-in': ('fadeIn 0.5s ease-out forwards',
+                '@keyframes fadeIn{0%{opacity:0}100%{opacity:1}}'),
+    'slide-up': ('slideUp 0.4s ease-out forwards',
+                 '@keyframes slideUp{0%{opacity:0;transform:translateY(20px)}100%{opacity:1;transform:translateY(0)}}'),
+    'pulse-glow': ('pulseGlow 2s ease-in-out infinite',
+                   '@keyframes pulseGlow{0%,100%{box-shadow:0 0 0 0 hsl(var(--accent) / 0.4)}'
+                   '50%{box-shadow:0 0 20px 4px hsl(var(--accent) / 0.2)}}'),
+}
+TRANSITION = 'transition-timing-function:cubic-bezier(0.4,0,0.2,1);transition-duration:150ms'
+STATIC_UTILITIES = {
+    'block': 'display:block', 'inline-block': 'display:inline-block', 'inline': 'display:inline',
+    'flex': 'display:flex', 'inline-flex': 'display:inline-flex', 'grid': 'display:grid',
+    'hidden': 'display:none',
+    'flex-col': 'flex-direction:column', 'flex-row': 'flex-direction:row', 'flex-wrap': 'flex-wrap:wrap',
+    'flex-1': 'flex:1 1 0%', 'shrink-0': 'flex-shrink:0',
+    'items-start': 'align-items:flex-start', 'items-center': 'align-items:center',
+    'items-end': 'align-items:flex-end', 'items-baseline': 'align-items:baseline',
+    'justify-start': 'justify-content:flex-start', 'justify-center': 'justify-content:center',
+    'justify-end': 'justify-content:flex-end', 'justify-between': 'justify-content:space-between',
+    'static': 'position:static', 'relative': 'position:relative', 'absolute': 'position:absolute',
+    'fixed': 'position:fixed', 'sticky': 'position:sticky',
+    'w-full': 'width:100%', 'h-full': 'height:100%', 'w-auto': 'width:auto',
+    'min-h-screen': 'min-height:100vh',
+    'text-left': 'text-align:left', 'text-center': 'text-align:center', 'text-right': 'text-align:right',
+    'whitespace-nowrap': 'white-space:nowrap',
+    'italic': 'font-style:italic', 'not-italic': 'font-style:normal',
+    'underline': 'text-decoration-line:underline', 'no-underline': 'text-decoration-line:none',
+    'uppercase': 'text-transform:uppercase',
+    'antialiased': '-webkit-font-smoothing:antialiased;-moz-osx-font-smoothing:grayscale',
+    'font-normal': 'font-weight:400', 'font-medium': 'font-weight:500',
+    'font-semibold': 'font-weight:600', 'font-bold': 'font-weight:700',
+    'tracking-tight': 'letter-spacing:-0.025em', 'tracking-wide': 'letter-spacing:0.025em',
+    'leading-none': 'line-height:1', 'leading-tight': 'line-height:1.25',
+    'leading-normal': 'line-height:1.5', 'leading-relaxed': 'line-height:1.625',
+    'rounded': 'border-radius:0.25rem', 'rounded-md': 'border-radius:0.375rem',
+    'rounded-lg': 'border-radius:0.5rem', 'rounded-full': 'border-radius:9999px',
+    'border': 'border-width:1px', 'border-0': 'border-width:0px',
+    'shadow-sm': 'box-shadow:0 1px 2px 0 rgb(0 0 0 / 0.05)',
+    'shadow-md': 'box-shadow:0 4px 6px -1px rgb(0 0 0 / 0.1),0 2px 4px -2px rgb(0 0 0 / 0.1)',
+    'shadow-lg': 'box-shadow:0 10px 15px -3px rgb(0 0 0 / 0.1),0 4px 6px -4px rgb(0 0 0 / 0.1)',
+    'overflow-hidden': 'overflow:hidden', 'overflow-auto': 'overflow:auto',
+    'overflow-x-auto': 'overflow-x:auto', 'overflow-y-auto': 'overflow-y:auto',
+    'pointer-events-none': 'pointer-events:none', 'pointer-events-auto': 'pointer-events:auto',
+    'cursor-pointer': 'cursor:pointer',
+    'list-disc': 'list-style-type:disc', 'list-decimal': 'list-style-type:decimal',
+    'list-inside': 'list-style-position:inside',
+    'transition': 'transition-property:color,background-color,border-color,text-decoration-color,fill,stroke,'
+                  'opacity,box-shadow,transform;' + TRANSITION,
+    'transition-all': 'transition-property:all;' + TRANSITION,
+    'transition-colors': 'transition-property:color,background-color,border-color,text-decoration-color,'
+                         'fill,stroke;' + TRANSITION,
+    'transition-opacity': 'transition-property:opacity;' + TRANSITION,
+    'transition-transform': 'transition-property:transform;' + TRANSITION,
+    'ease-in-out': 'transition-timing-function:cubic-bezier(0.4,0,0.2,1)',
+    'ease-out': 'transition-timing-function:cubic-bezier(0,0,0.2,1)',
+    'outline-none': 'outline:2px solid transparent;outline-offset:2px',
+    'scroll-smooth': 'scroll-behavior:smooth',
+    'bg-gradient-to-r': 'background-image:linear-gradient(to right,var(--tw-gradient-stops))',
+    'bg-gradient-to-b': 'background-image:linear-gradient(to bottom,var(--tw-gradient-stops))',
+    'rotate-180': 'transform:rotate(180deg)', 'scale-105': 'transform:scale(1.05)',
+    'sr-only': 'position:absolute;width:1px;height:1px;padding:0;margin:-1px;overflow:hidden;'
+               'clip:rect(0,0,0,0);white-space:nowrap;border-width:0',
+}
+SPACING_PROPERTIES = {
+    'p': ('padding',), 'px': ('padding-left', 'padding-right'), 'py': ('padding-top', 'padding-bottom'),
+    'pt': ('padding-top',), 'pr': ('padding-right',), 'pb': ('padding-bottom',), 'pl': ('padding-left',),
+    'm': ('margin',), 'mx': ('margin-left', 'margin-right'), 'my': ('margin-top', 'margin-bottom'),
+    'mt': ('margin-top',), 'mr': ('margin-right',), 'mb': ('margin-bottom',), 'ml': ('margin-left',),
+    'gap': ('gap',), 'top': ('top',), 'right': ('right',), 'bottom': ('bottom',), 'left': ('left',),
+    'inset': ('inset',), 'w': ('width',), 'h': ('height',), 'min-h': ('min-height',),
+    'max-h': ('max-height',), 'leading': ('line-height',),
+}
+VARIANT_PSEUDO = {'hover': ':hover', 'focus': ':focus', 'focus-visible': ':focus-visible', 'active': ':active'}
+VARIANT_PREFIX = {'dark': '.dark ', 'group-hover': '.group:hover '}
+
+# Trimmed-down Tailwind preflight
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border:0 solid hsl(var(--border))}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:" + FONT_FAMILIES['sans'] + "}"
+    "body{margin:0;line-height:inherit}"
+    "hr{height:0;color:inherit;border-top-width:1px}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "code,kbd,samp,pre{font-family:" + FONT_FAMILIES['mono'] + ";font-size:1em}"
+    "small{font-size:80%}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "button,input,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;"
+    "color:inherit;margin:0;padding:0}"
+    "button{background-color:transparent;background-image:none;cursor:pointer}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:hsl(var(--muted-foreground))}"
+    "img,svg,video,canvas,audio,iframe,embed,object,picture{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "[hidden]{display:none}"
+)
+
+
+def css_escape(name: str) -> str:
+    """Escape a class name for use in a CSS selector."""
+    return re.sub(r'([^a-zA-Z0-9_-])', r'\\\1', name)
+
+
+def split_variants(name: str) -> list[str]:
+    """Split 'dark:hover:bg-[a:b]' on colons outside of [arbitrary] values."""
+    parts, depth, current = [], 0, ''
+    for char in name:
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        if char == ':' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    return parts + [current]
+
+
+def color_value(name: str) -> str | None:
+    """CSS color for a theme color name, with an optional /opacity suffix."""
+    name, _, alpha = name.partition('/')
+    if alpha and not alpha.isdigit():
+        return None
+    if name in THEME_COLORS:
+        return f"hsl(var(--{name}) / {int(alpha) / 100:g})" if alpha else f"hsl(var(--{name}))"
+    simple = {'transparent': 'transparent', 'current': 'currentColor', 'white': '#fff', 'black': '#000'}
+    if name in simple and not alpha:
+        return simple[name]
+    return None
+
+
+def spacing_value(value: str) -> str | None:
+    """Tailwind spacing scale: 4 -> 1rem, 1.5 -> 0.375rem, px, auto, full, [arbitrary]."""
+    if value.startswith('[') and value.endswith(']'):
+        return value[1:-1].replace('_', ' ')
+    named = {'px': '1px', 'auto': 'auto', 'full': '100%', 'screen': '100vh'}
+    if value in named:
+        return named[value]
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return '0px' if number == 0 else f"{number * 0.25:g}rem"
+
+
+def utility_css(name: str) -> tuple[str, str] | None:
+    """(selector suffix, declarations) for a utility without variants, or None."""
+    if name in STATIC_UTILITIES:
+        return '', STATIC_UTILITIES[name]
+
+    negative = name.startswith('-')
+    base = name[1:] if negative else name
+
+    if base.startswith('animate-') and base[8:] in ANIMATIONS:
+        return '', f"animation:{ANIMATIONS[base[8:]][0]}"
+    if base.startswith('font-') and base[5:] in FONT_FAMILIES:
+        return '', f"font-family:{FONT_FAMILIES[base[5:]]}"
+    if base.startswith('max-w-') and base[6:] in MAX_WIDTHS:
+        return '', f"max-width:{MAX_WIDTHS[base[6:]]}"
+
+    # space-y-N: margin between stacked children
+    if base.startswith('space-y-'):
+        value = spacing_value(base[8:])
+        if value:
+            return ' > :not([hidden]) ~ :not([hidden])', f"margin-top:{value}"
+
+    for prefix, properties in sorted(SPACING_PROPERTIES.items(), key=lambda item: -len(item[0])):
+        if base.startswith(prefix + '-'):
+            value = spacing_value(base[len(prefix) + 1:])
+            if value is None:
+                break
+            if negative:
+                value = f"-{value}"
+            return '', ';'.join(f"{prop}:{value}" for prop in properties)
+
+    if negative:
+        if base.startswith('z-') and base[2:].isdigit():
+            return '', f"z-index:-{base[2:]}"
+        return None
+
+    if name.startswith('z-') and name[2:].isdigit():
+        return '', f"z-index:{name[2:]}"
+    if name.startswith('opacity-') and name[8:].isdigit():
+        return '', f"opacity:{int(name[8:]) / 100:g}"
+    if name.startswith('duration-') and name[9:].isdigit():
+        return '', f"transition-duration:{name[9:]}ms"
+    if name.startswith('underline-offset-') and name[17:].isdigit():
+        return '', f"text-underline-offset:{name[17:]}px"
+    if name.startswith('outline-offset-') and name[15:].isdigit():
+        return '', f"outline-offset:{name[15:]}px"
+    if name.startswith('outline-'):
+        if name[8:].isdigit():
+            return '', f"outline-width:{name[8:]}px"
+        color = color_value(name[8:])
+        return ('', f"outline-color:{color}") if color else None
+    if name.startswith('ring-'):
+        if name[5:].isdigit():
+            return '', f"box-shadow:0 0 0 {name[5:]}px var(--tw-ring-color,rgb(59 130 246 / 0.5))"
+        color = color_value(name[5:])
+        return ('', f"--tw-ring-color:{color}") if color else None
+
+    if name.startswith('text-'):
+        if name[5:] in FONT_SIZES:
+            size, line_height = FONT_SIZES[name[5:]]
+            return '', f"font-size:{size};line-height:{line_height}"
+        color = color_value(name[5:])
+        return ('', f"color:{color}") if color else None
+
+    if name.startswith('bg-'):
+        value = name[3:]
+        if value.startswith('[size:') and value.endswith(']'):
+            return '', f"background-size:{value[6:-1].replace('_', ' ')}"
+        if value.startswith('[') and value.endswith(']'):
+            return '', f"background-image:{value[1:-1].replace('_', ' ')}"
+        color = color_value(value)
+        return ('', f"background-color:{color}") if color else None
+
+    if name.startswith('border-'):
+        value = name[7:]
+        sides = {'t': 'top', 'r': 'right', 'b': 'bottom', 'l': 'left'}
+        side, _, width = value.partition('-')
+        if side in sides:
+            if not width:
+                return '', f"border-{sides[side]}-width:1px"
+            if width.isdigit():
+                return '', f"border-{sides[side]}-width:{width}px"
+            return None
+        if value.isdigit():
+            return '', f"border-width:{value}px"
+        color = color_value(value)
+        return ('', f"border-color:{color}") if color else None
+
+    if name.startswith(('from-', 'via-', 'to-')):
+        stop, _, value = name.partition('-')
+        color = color_value(value)
+        if not color:
+            return None
+        if stop == 'from':
+            return '', (f"--tw-gradient-from:{color};--tw-gradient-to:transparent;"
+                        "--tw-gradient-stops:var(--tw-gradient-from),var(--tw-gradient-to)")
+        if stop == 'via':
+            return '', ("--tw-gradient-to:transparent;"
+                        f"--tw-gradient-stops:var(--tw-gradient-from),{color},var(--tw-gradient-to)")
+        return '', f"--tw-gradient-to:{color}"
+
+    return None
+
+
+def utility_order(name: str) -> int:
+    """Sort key keeping shorthand utilities ahead of their single-side forms."""
+    prefix = split_variants(name)[-1].lstrip('-').split('-')[0]
+    if prefix in ('px', 'py', 'mx', 'my'):
+        return 1
+    if prefix in SPACING_PROPERTIES and len(SPACING_PROPERTIES[prefix]) == 1 and prefix[0] in 'pm' \
+            and len(prefix) == 2:
+        return 2
+    return 0
+
+
+def utility_rule(name: str, selector: str = None) -> str | None:
+    """Full CSS rule for a (possibly variant-prefixed) utility class, or None.
+
+    With selector, the utility is applied to that selector instead of its own
+    class (used to expand @apply).
+    """
+    *variants, base = split_variants(name)
+    resolved = utility_css(base)
+    if resolved is None:
+        return None
+    suffix, declarations = resolved
+
+    prefix = pseudo = ''
+    for variant in variants:
+        if variant in VARIANT_PSEUDO:
+            pseudo += VARIANT_PSEUDO[variant]
+        elif variant in VARIANT_PREFIX:
+            prefix += VARIANT_PREFIX[variant]
+        else:
+            return None
+
+    selectors = [part.strip() for part in selector.split(',')] if selector else ['.' + css_escape(name)]
+    full = ','.join(f"{prefix}{part}{pseudo}{suffix}" for part in selectors)
+    return f"{full}{{{declarations}}}"
+
+
+def expand_apply(css: str) -> tuple[str, set[str]]:
+    """Inline `@apply` utilities in css. Returns the CSS and unknown utilities."""
+    unknown = set()
+
+    def expand_rule(match):
+        selector, body = match.group(1).strip(), match.group(2)
+        if '@apply' not in body:
+            return match.group(0)
+        declarations, extra = [], []
+        for line in body.split(';'):
+            line = line.strip()
+            if not line.startswith('@apply'):
+                if line:
+                    declarations.append(line)
+                continue
+            for name in line[len('@apply'):].split():
+                if ':' in name.replace('[', ' [').split('[')[0]:
+                    rule = utility_rule(name, selector)
+                    if rule:
+                        extra.append(rule)
+                    else:
+                        unknown.add(name)
+                    continue
+                resolved = utility_css(name)
+                if resolved is None:
+                    unknown.add(name)
+                elif resolved[0]:
+                    extra.append(utility_rule(name, selector))
+                else:
+                    declarations.append(resolved[1])
+        return f"{selector}{{{';'.join(declarations)}}}" + ''.join(extra)
+
+    return re.sub(r'([^{}]+)\{([^{}]*)\}', expand_rule, css), unknown
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r'\s*:\s*(?=[^{}]*;|[^{}]*\})', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def stylesheet_sources(shell: str) -> list[str]:
+    """Everything utility classes are scanned from."""
+    sources = [shell, POST_TEMPLATE, READ_MORE_TEMPLATE, TAGS_TEMPLATE, TAG_TEMPLATE, PAGE_HEADING_TEMPLATE,
+               PAGINATION_TEMPLATE, PAGE_LINK_TEMPLATE, POST_PAGE_FOOTER_TEMPLATE, RELATED_TEMPLATE,
+               RELATED_LINK_TEMPLATE, IMAGE_CLASSES]
+    if Path("search.js").exists():
+        sources.append(Path("search.js").read_text(encoding='utf-8'))
+    return sources
+
+
+def build_stylesheet(shell: str, force: bool = False, post_classes: list[str] = ()) -> str | None:
+    """Compile site.css plus used utilities into assets/site-<hash>.css; returns its path.
+
+    post_classes are the class names used inside post bodies.
+    """
+    if not STYLESHEET_SOURCE.exists():
+        print(f"⚠️  {STYLESHEET_SOURCE} not found - pages keep their current stylesheet link")
+        return None
+
+    source_css = STYLESHEET_SOURCE.read_text(encoding='utf-8')
+    sources = stylesheet_sources(shell)
+    fingerprint = hash_bytes('\0'.join([str(STYLESHEET_VERSION), source_css, ' '.join(post_classes)]
+                                       + sources).encode('utf-8'))
+
+    try:
+        state = json.loads(STYLESHEET_STATE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        state = {}
+    if not force and state.get('fingerprint') == fingerprint and Path(state.get('path', '')).exists():
+        return state['path']
+
+    # Utilities that appear anywhere in the sources; shorthands (p-6) come
+    # before the single sides they may be combined with (pt-0)
+    candidates = sorted(dict.fromkeys(re.findall(r'[-a-zA-Z0-9:/.\[\]()_,%#]+', '\n'.join(sources))
+                                      + list(post_classes)), key=utility_order)
+    utilities, variants, animations = [], [], []
+    for name in candidates:
+        rule = utility_rule(name)
+        if rule is None:
+            continue
+        (variants if ':' in name.split('[')[0] else utilities).append(rule)
+        if name.startswith('animate-') and name[8:] in ANIMATIONS:
+            animations.append(ANIMATIONS[name[8:]][1])
+
+    components, unknown = expand_apply(minify_css(source_css))
+    css = PREFLIGHT + components + ''.join(utilities) + ''.join(variants) + ''.join(animations)
+    css = minify_css(css)
+
+    # Classes in class="" attributes that are neither utilities nor styled by site.css
+    defined = set(re.findall(r'\.([-a-zA-Z0-9_]+)', source_css))
+    for attr in re.findall(r'class="([^"{}]*)"', '\n'.join(sources)):
+        for name in attr.split():
+            if name not in defined and name != 'group' and utility_rule(name) is None:
+                unknown.add(name)
+
+    ASSETS_DIR.mkdir(exist_ok=True)
+    path = ASSETS_DIR / f"site-{hash_bytes(css.encode('utf-8'))[:8]}.css"
+    write_if_changed(path, css)
+    for old in ASSETS_DIR.glob("site-*.css"):
+        if old != path:
+            old.unlink()
+
+    atomic_write(STYLESHEET_STATE_PATH, json.dumps({'fingerprint': fingerprint, 'path': path.as_posix()}))
+    print(f"🎨 Stylesheet: {path.as_posix()} ({len(css) / 1024:.1f} KB, "
+          f"{len(utilities) + len(variants)} utilities)")
+    if unknown:
+        print(f"   ⚠️  No CSS for: {', '.join(sorted(unknown))}")
+    return path.as_posix()
+
+
+def link_stylesheet(html: str, path: str) -> str:
+    """Point the page's assets/site*.css link at the compiled stylesheet."""
+    return STYLESHEET_LINK_PATTERN.sub(f'href="{path}"', html)
+
+
+@site_locked
+def rebuild_stylesheet() -> bool:
+    """Compile the stylesheet without a full build (the `css` command)."""
+    if not is_site_dir():
+        return False
+    shell_path = LAYOUT_PATH if LAYOUT_PATH.exists() else Path("index.html")
+    shell = shell_path.read_text(encoding='utf-8')
+    post_classes = {name for entry in load_manifest()['posts'].values() for name in entry.get('classes', ())}
+    path = build_stylesheet(shell, force=True, post_classes=sorted(post_classes))
+    if path is None:
+        return False
+    # Before the first build, index.html is still the hand-edited page: relink it directly
+    if shell_path != LAYOUT_PATH and write_if_changed(shell_path, link_stylesheet(shell, path)):
+        print(f"   🔗 Linked {shell_path} to {path}")
+    return True
+
+
+PRESERVE_WHITESPACE_PATTERN = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2>)', re.DOTALL | re.IGNORECASE)
+
+
+def minify_html(html: str) -> str:
+    """Collapse whitespace and drop comments, leaving pre/textarea/script/style alone.
+
+    Whitespace runs become a single space (or newline), so inline spacing is
+    preserved. The posts region markers are kept.
+    """
+    parts = PRESERVE_WHITESPACE_PATTERN.split(html)
+    out = []
+    # split() yields text, whole preserved block, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        text = re.sub(r'<!--(?! posts:).*?-->', '', parts[i], flags=re.DOTALL)
+        text = re.sub(r'\s+', lambda m: '\n' if '\n' in m.group(0) else ' ', text)
+        out.append(text)
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return ''.join(out).strip() + '\n'
+
+
+# =============================================================================
+# Web Fonts & Critical CSS
+# =============================================================================
+#
+# Fonts vendored in fonts/ (`python manager.py fonts --fetch` downloads them
+# from Google Fonts' repository, OFL-licensed) are subset to the characters
+# the site actually uses - printable ASCII plus whatever else appears in
+# posts and the layout - and written to assets/fonts/<family>-<hash>.woff2.
+# Characters are tracked per post, so fonts are only re-subset when the
+# character set changes. Once every family is vendored, built pages drop
+# the Google Fonts link and preload the subsets instead.
+#
+# Pages also inline the stylesheet rules the layout and the first post
+# need (their classes appear in the layout or post templates) and load the
+# full stylesheet without blocking rendering.
+
+FONTS_DIR = Path("fonts")
+FONT_ASSETS_DIR = ASSETS_DIR / "fonts"
+FONTS_STATE_PATH = BUILD_DIR / "fonts.json"
+FONT_SUBSET_VERSION = 1
+FONTS_URL = "https://github.com/google/fonts/raw/main/ofl"
+
+# Vendored fonts: family -> (file in fonts/, CSS font-weight range, directory under FONTS_URL)
+FONT_FILES = {
+    'Space Grotesk': ('SpaceGrotesk[wght].ttf', '300 700', 'spacegrotesk'),
+    'JetBrains Mono': ('JetBrainsMono[wght].ttf', '100 800', 'jetbrainsmono'),
+}
+FONT_BASE_CHARS = ''.join(map(chr, range(0x20, 0x7f)))  # always kept, so ASCII-only posts never re-subset
+FONT_FORMATS = {'.woff2': 'woff2', '.woff': 'woff', '.ttf': 'truetype', '.otf': 'opentype'}
+FONT_MIME_TYPES = {'woff2': 'font/woff2', 'woff': 'font/woff', 'truetype': 'font/ttf', 'opentype': 'font/otf'}
+
+FONT_FACE_TEMPLATE = ("@font-face{{font-family:'{family}';src:url({url}) format('{format}');"
+                      "font-weight:{weight};font-style:normal;font-display:swap}}")
+FONT_PRELOAD_TEMPLATE = '<link rel="preload" href="{url}" as="font" type="{mime}" crossorigin>'
+GOOGLE_FONTS_PATTERN = re.compile(r'[ \t]*<link\b[^>]*\bfonts\.(?:googleapis|gstatic)\.com[^>]*>\n?')
+STYLESHEET_TAG_PATTERN = re.compile(r'<link\b[^>]*\bhref="(assets/site-[0-9a-f]{8}\.css)"[^>]*>')
+CLASS_SELECTOR_PATTERN = re.compile(r'\.((?:\\.|[-\w])+)')
+SCRIPT_CLASS_PATTERN = re.compile(r"""classList\.(?:add|toggle)\(\s*['"]([^'"]+)['"]""")
+CRITICAL_CSS_MAX_RATIO = 0.5  # above this share of the stylesheet, inlining only duplicates it
+
+
+def used_characters(ordered: list[dict], shell: str, previous: dict) -> tuple[str, dict]:
+    """Every character the site's pages can show. Returns (sorted chars, per-post cache).
+
+    previous maps sources to [hash, non-ASCII chars] from the last build.
+    """
+    posts, chars = {}, set(FONT_BASE_CHARS)
+    for entry in ordered:
+        cached = previous.get(entry['source'])
+        if not cached or cached[0] != entry['hash']:
+            cached = [entry['hash'], ''.join(sorted({c for c in unescape(entry['html']) if c > '~'}))]
+        posts[entry['source']] = cached
+        chars.update(cached[1])
+    for text in stylesheet_sources(shell):
+        chars.update(c for c in unescape(text) if c > '~')
+    return ''.join(sorted(c for c in chars if c.isprintable())), posts
+
+
+def subset_font(source: Path, chars: str) -> tuple[bytes, str]:
+    """The font reduced to chars, as (data, file suffix); the whole file without fontTools."""
+    if not HAS_FONTTOOLS:
+        return source.read_bytes(), source.suffix.lower()
+    subset = lazy_import('fontTools.subset')
+    # fontTools logs every table it can't subset (and drops it); that's expected
+    lazy_import('logging').getLogger('fontTools').setLevel(lazy_import('logging').ERROR)
+    options = subset.Options()
+    options.flavor = 'woff2' if HAS_BROTLI else 'woff'
+    options.layout_features = ['*']
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=chars)
+    subsetter.subset(font)
+    io = lazy_import('io')
+    out = io.BytesIO()
+    subset.save_font(font, out, options)
+    return out.getvalue(), '.' + options.flavor
+
+
+def build_fonts(ordered: list[dict], shell: str, force: bool = False) -> tuple[list[dict], bool]:
+    """Subset vendored fonts when the used characters changed.
+
+    Returns (font faces, whether every family in FONT_FILES is vendored).
+    """
+    try:
+        state = json.loads(FONTS_STATE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        state = {}
+    chars, posts = used_characters(ordered, shell, state.get('posts', {}))
+
+    sources = {family: FONTS_DIR / name for family, (name, _, _) in FONT_FILES.items()
+               if (FONTS_DIR / name).exists()}
+    fingerprint = hash_bytes('\0'.join(
+        [str(FONT_SUBSET_VERSION), str(HAS_FONTTOOLS), str(HAS_BROTLI), chars]
+        + [f"{family}:{path.stat().st_mtime_ns}:{path.stat().st_size}" for family, path in sources.items()]
+    ).encode('utf-8'))
+
+    faces = state.get('faces', [])
+    if force or state.get('fingerprint') != fingerprint or not all(Path(f['path']).exists() for f in faces):
+        with span('fonts.subset', families=len(sources), chars=len(chars)):
+            faces, sizes = [], []
+            for family, path in sources.items():
+                data, suffix = subset_font(path, chars)
+                out = FONT_ASSETS_DIR / f"{slugify(family)}-{hash_bytes(data)[:8]}{suffix}"
+                if not out.exists():
+                    atomic_write(out, data)
+                faces.append({'family': family, 'path': out.as_posix(), 'weight': FONT_FILES[family][1],
+                              'format': FONT_FORMATS[suffix]})
+                sizes.append(f"{out.name} {len(data) / 1024:.1f} KB (from {path.stat().st_size / 1024:.0f} KB)")
+            for old in FONT_ASSETS_DIR.glob("*") if FONT_ASSETS_DIR.exists() else ():
+                if old.as_posix() not in {face['path'] for face in faces}:
+                    old.unlink()
+        if sources:
+            print(f"🔤 Fonts: {len(chars)} character(s) - " + ", ".join(sizes))
+            if not HAS_FONTTOOLS:
+                print("   💡 pip install fonttools brotli to subset them")
+    BUILD_DIR.mkdir(exist_ok=True)
+    write_if_changed(FONTS_STATE_PATH, json.dumps({'fingerprint': fingerprint, 'faces': faces, 'posts': posts}))
+    return faces, len(sources) == len(FONT_FILES)
+
+
+def split_selectors(prelude: str) -> list[str]:
+    """Split a selector list on top-level commas (not escaped or inside parentheses)."""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(prelude):
+        ch = prelude[i]
+        if ch == '\\':
+            i += 1
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(prelude[start:i])
+            start = i + 1
+        i += 1
+    parts.append(prelude[start:])
+    return parts
+
+
+def css_blocks(css: str):
+    """Yield (prelude, body) for each top-level block of minified CSS."""
+    depth = start = brace = 0
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                brace = i
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                yield css[start:brace], css[brace + 1:i]
+                start = i + 1
+
+
+def critical_css(css: str, vocabulary: set[str]) -> str:
+    """Rules of css whose class selectors all appear in vocabulary, plus the keyframes they use."""
+    out, keyframes = [], []
+    for prelude, body in css_blocks(css):
+        if prelude.startswith(('@media', '@supports')):
+            inner = critical_css(body, vocabulary)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith('@keyframes'):
+            keyframes.append((prelude.split()[-1], f"{prelude}{{{body}}}"))
+        elif prelude.startswith('@'):
+            out.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [selector for selector in split_selectors(prelude)
+                         if all(re.sub(r'\\(.)', r'\1', name) in vocabulary
+                                for name in CLASS_SELECTOR_PATTERN.findall(selector))]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    css = ''.join(out)
+    return css + ''.join(rule for name, rule in keyframes if name in css)
+
+
+def inline_critical_css(shell: str, stylesheet: str, faces: list[dict], vendored: bool, first_post: str = '') -> str:
+    """Inline critical CSS and font faces into the shell; the full stylesheet loads asynchronously.
+
+    first_post is the listing html of the newest post. When the critical rules
+    come to more than CRITICAL_CSS_MAX_RATIO of the stylesheet, only the font
+    faces are inlined and the stylesheet stays an ordinary link.
+    """
+    match = STYLESHEET_TAG_PATTERN.search(shell)
+    if not match:
+        return shell
+    # Above the fold: the layout before the posts, the first post (or a tag
+    # page's heading), and classes the layout's scripts add (dark, collapsed...)
+    start = shell.find(POSTS_BEGIN)
+    text = '\n'.join([shell[:start] if start != -1 else shell, first_post, PAGE_HEADING_TEMPLATE])
+    vocabulary = set(re.findall(r'[-a-zA-Z0-9_:/.\[\]()%#,]+', text)) | set(SCRIPT_CLASS_PATTERN.findall(shell))
+    fonts = ''.join(FONT_FACE_TEMPLATE.format(family=face['family'], url=face['path'], format=face['format'],
+                                              weight=face['weight']) for face in faces)
+    css = Path(stylesheet).read_text(encoding='utf-8')
+    critical = critical_css(css, vocabulary)
+
+    href = match.group(1)
+    head = [FONT_PRELOAD_TEMPLATE.format(url=face['path'], mime=FONT_MIME_TYPES[face['format']]) for face in faces]
+    if len(critical) > CRITICAL_CSS_MAX_RATIO * len(css):
+        head += [f'<style>{fonts}</style>'] if fonts else []
+        head.append(match.group(0))
+    else:
+        head += [f'<style>{fonts}{critical}</style>',
+                 f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">',
+                 f'<noscript><link rel="stylesheet" href="{href}"></noscript>']
+    shell = shell[:match.start()] + '\n    '.join(head) + shell[match.end():]
+    return GOOGLE_FONTS_PATTERN.sub('', shell) if vendored else shell
+
+
+@site_locked
+def fetch_fonts() -> bool:
+    """Download FONT_FILES (and their OFL license) into fonts/ (the `fonts --fetch` command)."""
+    request = lazy_import('urllib.request')
+    parse = lazy_import('urllib.parse')
+    for family, (name, _, directory) in FONT_FILES.items():
+        for filename, target in ((name, name), ('OFL.txt', f"{Path(name).stem.split('[')[0]}-OFL.txt")):
+            url = f"{FONTS_URL}/{directory}/{parse.quote(filename)}"
+            try:
+                with request.urlopen(url, timeout=60) as response:
+                    atomic_write(FONTS_DIR / target, response.read())
+            except OSError as e:
+                print(f"❌ Error: could not download {url}: {e}")
+                return False
+        print(f"🔤 Vendored {family}: {(FONTS_DIR / name).as_posix()}")
+    print("💡 Run 'python manager.py build' to subset them and use them instead of Google Fonts")
+    return True
+
+
+def font_status():
+    """Show vendored fonts and their current subsets (the `fonts` command)."""
+    try:
+        state = json.loads(FONTS_STATE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        state = {}
+    faces = {face['family']: face for face in state.get('faces', [])}
+    print(f"🔤 Fonts in {FONTS_DIR.as_posix()}/ (subsetting: {'fontTools' if HAS_FONTTOOLS else 'off'}, "
+          f"{'woff2' if HAS_BROTLI else 'woff'})")
+    for family, (name, weight, _) in FONT_FILES.items():
+        source = FONTS_DIR / name
+        if not source.exists():
+            print(f"   {family:<16} not vendored - run 'python manager.py fonts --fetch'")
+            continue
+        face = faces.get(family)
+        subset = Path(face['path']) if face else None
+        built = (f"-> {subset.as_posix()} ({subset.stat().st_size / 1024:.1f} KB)"
+                 if subset and subset.exists() else "(not built yet)")
+        print(f"   {family:<16} {source.stat().st_size / 1024:7.1f} KB  weights {weight}  {built}")
+
+
+# =============================================================================
+# Asset Fingerprints & Service Worker
+# =============================================================================
+#
+# Static files keep their names but pages reference them as name?v=<content
+# hash> (the stylesheet and resized images carry the hash in their names
+# instead), so a URL's bytes never change and can be cached for good.
+# `build` lists the fingerprinted URLs worth having offline - stylesheet,
+# scripts and the newest posts' body fragments - in sw-manifest.json, and
+# writes sw.js to precache them. Since changed content means a new URL, a
+# publish only makes the worker fetch the new URLs and drop the old ones.
+
+SW_PATH = Path("sw.js")
+SW_MANIFEST_PATH = Path("sw-manifest.json")
+SW_MANIFEST_VERSION = 1
+SW_PRECACHE_POSTS = POSTS_PER_PAGE  # newest posts whose body fragment is precached
+SW_RUNTIME_ENTRIES = 200  # fingerprinted files cached on first use
+
+# Local script, stylesheet and image references in the page shell
+FINGERPRINT_PATTERN = re.compile(
+    r'\b(src|href)="((?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)[^"?#]+\.(?:js|css|png|jpe?g|webp|gif|svg|ico))"')
+HASHED_NAME_PATTERN = re.compile(r'-[0-9a-f]{8}(?:-\d+)?\.\w+$')
+# Fingerprinted scripts, stylesheets and fonts in a built shell (precached)
+SHELL_ASSET_PATTERN = re.compile(
+    r'\b(?:src|href)="((?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)[^"?#]+\.(?:js|css|woff2?|ttf|otf)(?:\?v=[0-9a-f]{8})?)"')
+
+SW_TEMPLATE = """// Generated by manager.py build from sw-manifest.json - edit SW_TEMPLATE instead
+const MANIFEST = 'sw-manifest.json?v=__MANIFEST_HASH__';
+const PRECACHE = 'wf-precache';
+const RUNTIME = 'wf-runtime';
+const root = new URL('./', self.location);
+
+async function manifestUrls() {
+    const manifest = await (await fetch(new URL(MANIFEST, root))).json();
+    return manifest.urls.map(url => new URL(url, root).href);
+}
+
+// Fetch only URLs the precache doesn't have yet - unchanged content keeps its URL
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE);
+        const cached = new Set((await cache.keys()).map(request => request.url));
+        const missing = (await manifestUrls()).filter(url => !cached.has(url));
+        await Promise.all(missing.map(url => cache.add(url).catch(() => {})));
+        await self.skipWaiting();
+    })());
+});
+
+// Drop URLs that left the manifest
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE);
+        const keep = new Set(await manifestUrls());
+        for (const request of await cache.keys()) {
+            if (!keep.has(request.url)) await cache.delete(request);
+        }
+        await self.clients.claim();
+    })());
+});
+
+async function cacheFirst(request) {
+    const hit = await caches.match(request);
+    if (hit) return hit;
+    const response = await fetch(request);
+    if (response.ok) {
+        const cache = await caches.open(RUNTIME);
+        await cache.put(request, response.clone());
+        const keys = await cache.keys();
+        for (const old of keys.slice(0, Math.max(0, keys.length - __RUNTIME_ENTRIES__))) await cache.delete(old);
+    }
+    return response;
+}
+
+async function networkFirst(request) {
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            const cache = await caches.open(RUNTIME);
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (e) {
+        return (await caches.match(request)) || (await caches.match(new URL('./', root))) || Response.error();
+    }
+}
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== root.origin || !url.pathname.startsWith(root.pathname)
+            || url.pathname.startsWith(root.pathname + 'api/')) return;
+    if (event.request.mode === 'navigate') {
+        // Pages: always try the network so new posts show up; cached copies work offline
+        event.respondWith(networkFirst(event.request));
+    } else if (url.searchParams.has('v') || /-[0-9a-f]{8}(-\\d+)?\\.\\w+$/.test(url.pathname)) {
+        event.respondWith(cacheFirst(event.request));
+    }
+});
+"""
+
+
+def fingerprint_url(url: str) -> str:
+    """url with ?v=<content hash> of the local file it names (unchanged if missing or already hashed)."""
+    if HASHED_NAME_PATTERN.search(url):
+        return url
+    try:
+        return f"{url}?v={hash_bytes(Path(url).read_bytes())[:8]}"
+    except OSError:
+        return url
+
+
+def fingerprint_shell(html: str) -> str:
+    """Fingerprint local scripts, stylesheets and images referenced by the page shell."""
+    return FINGERPRINT_PATTERN.sub(lambda m: f'{m.group(1)}="{fingerprint_url(m.group(2))}"', html)
+
+
+def build_service_worker(shell: str, ordered: list[dict]) -> bool:
+    """Write sw-manifest.json and sw.js when the set of precached URLs changed."""
+    urls = set(SHELL_ASSET_PATTERN.findall(shell))
+    for entry in ordered[:SW_PRECACHE_POSTS]:
+        if entry['listing'] != entry['html']:
+            urls.add(f"{post_page_url(entry['slug'])}body.html?v={entry['body_version']}")
+
+    try:
+        previous = set(json.loads(SW_MANIFEST_PATH.read_text(encoding='utf-8'))['urls'])
+    except (OSError, ValueError, KeyError):
+        previous = set()
+
+    manifest = json.dumps({'version': SW_MANIFEST_VERSION, 'urls': sorted(urls)}, indent=1)
+    worker = SW_TEMPLATE.replace('__MANIFEST_HASH__', hash_bytes(manifest.encode('utf-8'))[:8]) \
+        .replace('__RUNTIME_ENTRIES__', str(SW_RUNTIME_ENTRIES))
+    changed = write_if_changed(SW_MANIFEST_PATH, manifest)
+    changed |= write_if_changed(SW_PATH, worker)
+    if changed:
+        print(f"   🧰 Service worker: {len(urls)} precached URL(s), "
+              f"{len(urls - previous)} new, {len(previous - urls)} dropped")
+    return changed
+
+
+# =============================================================================
+# Dist Output
+# =============================================================================
+#
+# `build --out dist` copies only publishable files (generated pages, feeds,
+# assets, images, search index) into a separate directory and writes .gz (and
+# .zst with zstandard) siblings at maximum compression. .site/dist.json keeps
+# each file's hash and sizes, so unchanged files are neither copied nor
+# recompressed, and the report shows how the payload moved since last time.
+
+DIST_STATE_PATH = BUILD_DIR / "dist.json"
+DIST_FILES = ("index.html", "search.js", "sw-register.js", SW_PATH.name, SW_MANIFEST_PATH.name,
+              "feed.xml", "atom.xml", "feed.xsl", "favicon.ico", "robots.txt")
+DIST_DIRS = ("page", "tags", POST_PAGES_DIR.as_posix(), "search", "assets", "images")
+COMPRESSIBLE_SUFFIXES = frozenset(['.html', '.css', '.js', '.json', '.xml', '.xsl', '.svg', '.txt', '.ico'])
+COMPRESS_MIN_BYTES = 256  # smaller files aren't worth a sibling
+DIST_REPORT_LINES = 20
+
+
+def is_publishable(url_path: str) -> bool:
+    """Whether a site-relative path (decoded) belongs to the published site - what `build --out` exports."""
+    parts = [part for part in url_path.split('/') if part]
+    if not parts:
+        return True  # the site root, index.html
+    if any(part.startswith('.') for part in parts):
+        return False
+    return (len(parts) == 1 and parts[0] in DIST_FILES) or parts[0] in DIST_DIRS
+
+
+def dist_sources() -> list[Path]:
+    """Every publishable file in the site root, in a stable order."""
+    paths = [Path(name) for name in DIST_FILES if Path(name).is_file()]
+    for directory in DIST_DIRS:
+        if Path(directory).is_dir():
+            paths.extend(sorted(path for path in Path(directory).rglob("*")
+                                if path.is_file() and not path.name.startswith('.')))
+    return paths
+
+
+def compress_file(data: bytes) -> dict[str, bytes]:
+    """Precompressed variants of data, keyed by file suffix."""
+    variants = {'.gz': lazy_import('gzip').compress(data, 9, mtime=0)}
+    if HAS_ZSTD:
+        variants['.zst'] = lazy_import('zstandard').ZstdCompressor(level=22).compress(data)
+    return variants
+
+
+def format_size(size: int) -> str:
+    """Human-readable byte count."""
+    return f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+
+
+@site_locked
+def export_dist(out: Path) -> bool:
+    """Mirror the publishable files into out with precompressed siblings."""
+    started = time.perf_counter()
+    resolved, root = out.resolve(), Path.cwd().resolve()
+    protected = [root / name for name in DIST_DIRS + (POSTS_DIR.name, DRAFTS_DIR.name, BUILD_DIR.name)]
+    if resolved == root or resolved in root.parents or any(p == resolved or p in resolved.parents for p in protected):
+        print(f"❌ Refusing to export into {out.as_posix()} - pick a directory of its own, e.g. dist")
+        return False
+    try:
+        previous = json.loads(DIST_STATE_PATH.read_text(encoding='utf-8'))
+        if previous.get('out') != out.as_posix() or previous.get('zstd') != HAS_ZSTD:
+            previous = {}
+    except (OSError, ValueError):
+        previous = {}
+    old_files = previous.get('files', {})
+
+    files, written = {}, []
+    for path in dist_sources():
+        key = path.as_posix()
+        data = path.read_bytes()
+        digest = hash_bytes(data)
+        target = out / path
+        entry = old_files.get(key)
+        siblings = [target.with_name(target.name + suffix) for suffix in (entry or {}).get('variants', {})]
+        if entry and entry['hash'] == digest and target.exists() and all(p.exists() for p in siblings):
+            files[key] = entry
+            continue
+
+        entry = {'hash': digest, 'size': len(data), 'variants': {}}
+        atomic_write(target, data, sync=False)
+        if path.suffix in COMPRESSIBLE_SUFFIXES and len(data) >= COMPRESS_MIN_BYTES:
+            for suffix, packed in compress_file(data).items():
+                atomic_write(target.with_name(target.name + suffix), packed, sync=False)
+                entry['variants'][suffix] = len(packed)
+        files[key] = entry
+        written.append(key)
+
+    # Drop files (and their siblings) that are no longer published
+    for key in set(old_files) - set(files):
+        target = out / key
+        for stale in [target] + [target.with_name(target.name + suffix) for suffix in old_files[key]['variants']]:
+            stale.unlink(missing_ok=True)
+        for parent in target.parents:
+            if parent == out or not parent.exists() or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+    atomic_write(DIST_STATE_PATH, json.dumps({'out': out.as_posix(), 'zstd': HAS_ZSTD, 'files': files}, indent=1))
+    record_span('export_dist', started, time.perf_counter() - started, files=len(files), written=len(written))
+
+    def total(entries: dict, suffix: str = None) -> int:
+        return sum(e['variants'].get(suffix, e['size']) if suffix else e['size'] for e in entries.values())
+
+    print(f"📦 {out.as_posix()}/: {len(files)} file(s), {len(written)} updated, "
+          f"{len(set(old_files) - set(files))} removed")
+    if written:
+        print(f"   {'file':<48} {'raw':>10} {'gzip':>10} {'zstd':>10}  {'gz vs last':>10}")
+        for key in sorted(written, key=lambda k: -files[k]['size'])[:DIST_REPORT_LINES]:
+            entry, old = files[key], old_files.get(key)
+            gz, zst = entry['variants'].get('.gz'), entry['variants'].get('.zst')
+            delta = ''
+            if old:
+                change = (gz or entry['size']) - old['variants'].get('.gz', old['size'])
+                delta = f"{change:+d} B"
+            name = key if len(key) <= 48 else '…' + key[-47:]
+            print(f"   {name:<48} {format_size(entry['size']):>10} "
+                  f"{format_size(gz) if gz else '-':>10} {format_size(zst) if zst else '-':>10}  {delta:>10}")
+        if len(written) > DIST_REPORT_LINES:
+            print(f"   ... and {len(written) - DIST_REPORT_LINES} more")
+    for label, suffix in (('raw', None), ('gzip', '.gz')) + ((('zstd', '.zst'),) if HAS_ZSTD else ()):
+        now, before = total(files, suffix), total(old_files, suffix)
+        change = f"  ({now - before:+,d} B)" if old_files else ''
+        print(f"   Σ {label:<5} {format_size(now):>10}{change}")
+    return True
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+#
+# `bench` builds throwaway sites from synthetic corpora (code blocks, tables,
+# images) in a temp directory and times each publish-path stage: cold and
+# no-op builds, a single new post, feeds, listing, reindexing, the drafts
+# list, raw Markdown conversion, and importing a pathological legacy page
+# (long posts with deeply nested <div>s, the worst case for ARTICLE_PATTERN).
+# Results are written as JSON; `--compare` diffs against an earlier run.
+
+BENCH_VERSION = 1
+BENCH_SIZES = (10, 1000, 10000)
+BENCH_TAGS = ('ai', 'local-llm', 'python', 'tools', 'notes', 'homelab', 'privacy', 'agents')
+BENCH_LEGACY_ARTICLES = 100
+BENCH_LEGACY_NESTING = 500
+
+# Smallest valid PNG, used when Pillow can't draw a real image
+BENCH_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082")
+
+
+def bench_post_body(i: int, paragraphs: int = 6) -> str:
+    """Synthetic Markdown with headings, lists, a table, a code block and an image."""
+    words = "local models agents retrieval latency tokens context quantized inference pipeline".split()
+
+    def text(n: int) -> str:
+        return ' '.join(words[(i + k) % len(words)] for k in range(n)).capitalize() + '.'
+
+    parts = [f"## Section {i}", text(40)]
+    for p in range(paragraphs):
+        parts.append(f"{text(25)} **{words[p % len(words)]}** and `{words[(p + 3) % len(words)]}()`.")
+    parts.append("- first point\n- second point\n- third point")
+    parts.append("| Model | Params | Tokens/s |\n|---|---|---|\n"
+                 + '\n'.join(f"| m{i}-{r} | {r + 1}B | {(i * 7 + r) % 90 + 10} |" for r in range(4)))
+    parts.append(f"```python\ndef step_{i}(x):\n    return [v * {i % 9 + 1} for v in x if v]\n```")
+    parts.append(f"![Figure {i}](images/bench-{i % 3}.png)")
+    return '\n\n'.join(parts)
+
+
+def bench_legacy_page(shell: str) -> str:
+    """A hand-maintained style page whose posts are long and deeply nested."""
+    articles = []
+    for i in range(BENCH_LEGACY_ARTICLES):
+        nested = '<div>' * BENCH_LEGACY_NESTING + f"<p>{'deep text ' * 50}</p>" + '</div>' * BENCH_LEGACY_NESTING
+        body = f"<p>{'long paragraph ' * 400}</p>" + nested
+        articles.append(POST_TEMPLATE.format(
+            slug=f"legacy-{i}", title=f"Legacy {i}", iso_date=f"2020-01-01T00:{i // 60:02d}:{i % 60:02d}",
+            date_display="2020-01-01::00:00", content=body, read_more='', tags_html=create_tags_html(['legacy'])))
+    start = shell.index(POSTS_BEGIN)
+    end = shell.index(POSTS_END) + len(POSTS_END)
+    return shell[:start] + ''.join(articles) + shell[end:]
+
+
+def bench_reset():
+    """Forget in-process caches so each corpus starts cold."""
+    global _post_index_cache, _post_slug_map, _render_cache_size
+    _post_index_cache = _post_slug_map = _render_cache_size = None
+    _render_cache_stats.update(hits=0, misses=0)
+
+
+def bench_stage(results: dict, name: str, func, trace_memory: bool = False):
+    """Run func with stdout silenced; record time, process peak RSS and (optionally) Python peak."""
+    tracemalloc = lazy_import('tracemalloc') if trace_memory else None
+    if tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(lazy_import('io').StringIO()):
+        func()
+    result = {'seconds': round(time.perf_counter() - started, 4)}
+    if tracemalloc:
+        result['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    if sys.platform != 'win32':
+        resource = lazy_import('resource')
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 1 if sys.platform == 'darwin' else 1024
+        result['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+    results[name] = result
+    print(f"   {name:<26} {result['seconds'] * 1000:10.1f} ms"
+          + (f"  {result['peak_rss_mb']:8.1f} MB rss" if 'peak_rss_mb' in result else '')
+          + (f"  {result['python_peak_mb']:8.1f} MB py" if 'python_peak_mb' in result else ''))
+
+
+def bench_corpus(size: int, shell: str, jobs: int, trace_memory: bool) -> dict:
+    """Create a synthetic site with size posts in the current directory and time every stage."""
+    atomic_write(LAYOUT_PATH, shell)
+    IMAGES_DIR.mkdir(exist_ok=True)
+    for n in range(3):
+        image = IMAGES_DIR / f"bench-{n}.png"
+        if HAS_PIL:
+            lazy_import('PIL.Image').new('RGB', (1600, 900), (40 * n, 120, 90)).save(image)
+        else:
+            image.write_bytes(BENCH_PNG)
+
+    start = datetime.datetime(2020, 1, 1)
+    for i in range(size):
+        date = (start + datetime.timedelta(hours=i)).isoformat()
+        tags = [BENCH_TAGS[i % len(BENCH_TAGS)], BENCH_TAGS[(i * 3 + 1) % len(BENCH_TAGS)]]
+        write_post_source(f"Synthetic post {i}", bench_post_body(i), tags, date, slug=f"synthetic-{i}")
+    Path("drafts").mkdir(exist_ok=True)
+    for i in range(size):
+        (Path("drafts") / f"draft-{i}.md").write_text(
+            f'---\ntitle: "Draft {i}"\ntags: ai, drafts\n---\n\n{bench_post_body(i, 2)}\n', encoding='utf-8')
+
+    results = {}
+    bodies = [bench_post_body(i) for i in range(size)]
+
+    def convert_all():
+        global RENDER_CACHE_ENABLED
+        enabled, RENDER_CACHE_ENABLED = RENDER_CACHE_ENABLED, False
+        try:
+            for body in bodies:
+                convert_markdown(body)
+        finally:
+            RENDER_CACHE_ENABLED = enabled
+
+    bench_stage(results, 'convert_markdown', convert_all, trace_memory)
+    bench_stage(results, 'build (cold)', lambda: build_site(force=True, jobs=jobs), trace_memory)
+    bench_stage(results, 'build (no changes)', lambda: build_site(jobs=jobs), trace_memory)
+    bench_stage(results, 'create_post', lambda: create_post("Fresh post", bench_post_body(size), ['ai']),
+                trace_memory)
+    bench_stage(results, 'generate_rss (cold)', generate_rss, trace_memory)
+    bench_stage(results, 'generate_rss (no changes)', generate_rss, trace_memory)
+    bench_reset()
+    bench_stage(results, 'list_posts (cold)', list_posts, trace_memory)
+    bench_stage(results, 'reindex', reindex, trace_memory)
+    bench_stage(results, 'list_drafts', list_drafts, trace_memory)
+    return results
+
+
+def bench_legacy(shell: str, trace_memory: bool) -> dict:
+    """Time importing and indexing a page of long, deeply nested legacy posts."""
+    page = bench_legacy_page(shell)
+    results = {}
+    bench_stage(results, 'migrate_index (nested)', lambda: migrate_index(page), trace_memory)
+    data = page.encode('utf-8')
+    bench_stage(results, 'locate_articles (nested)', lambda: locate_articles(data), trace_memory)
+    return results
+
+
+def run_benchmarks(sizes: list[int], output: Path = None, compare: Path = None,
+                   jobs: int = 1, trace_memory: bool = False) -> dict | None:
+    """Benchmark every stage on synthetic sites of the given sizes; write JSON results."""
+    shell = load_layout()
+    if shell is None:
+        return None
+    stylesheet_inputs = [path for path in (STYLESHEET_SOURCE, Path("search.js")) if path.exists()]
+
+    home = Path.cwd()
+    report = {
+        'version': BENCH_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'markdown': HAS_MARKDOWN,
+        'pillow': HAS_PIL,
+        'pygments': HAS_PYGMENTS,
+        'numpy': HAS_NUMPY,
+        'fonttools': HAS_FONTTOOLS,
+        'jobs': jobs,
+        'results': {},
+    }
+    try:
+        head = (home / ".git" / "HEAD").read_text().strip()
+        ref = home / ".git" / head.removeprefix('ref: ')
+        report['commit'] = ref.read_text().strip() if head.startswith('ref: ') and ref.exists() else head
+    except OSError:
+        pass
+
+    tempfile = lazy_import('tempfile')
+    shutil = lazy_import('shutil')
+    for size in sizes:
+        workdir = Path(tempfile.mkdtemp(prefix=f"wf-bench-{size}-"))
+        print(f"\n🏋️  {size} post(s)  ({workdir})")
+        try:
+            for path in stylesheet_inputs:
+                shutil.copy(home / path, workdir / path.name)
+            os.chdir(workdir)
+            bench_reset()
+            report['results'][str(size)] = bench_corpus(size, shell, jobs, trace_memory)
+        finally:
+            os.chdir(home)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    workdir = Path(tempfile.mkdtemp(prefix="wf-bench-legacy-"))
+    print(f"\n🏋️  Legacy page: {BENCH_LEGACY_ARTICLES} long posts, <div> nesting {BENCH_LEGACY_NESTING}")
+    try:
+        os.chdir(workdir)
+        bench_reset()
+        report['results']['legacy'] = bench_legacy(shell, trace_memory)
+    finally:
+        os.chdir(home)
+        shutil.rmtree(workdir, ignore_errors=True)
+    bench_reset()
+
+    output = output or BUILD_DIR / "bench" / f"bench-{report['created'].replace(':', '')}.json"
+    atomic_write(output, json.dumps(report, indent=1))
+    print(f"\n📊 Results written to {output.as_posix()}")
+    if compare:
+        compare_benchmarks(json.loads(compare.read_text(encoding='utf-8')), report)
+    return report
+
+
+def compare_benchmarks(before: dict, after: dict):
+    """Print per-stage timing changes between two bench reports."""
+    label = before.get('commit', '')[:12] or before.get('created', 'previous run')
+    print(f"\n📈 Compared with {label}:")
+    for corpus, stages in after['results'].items():
+        old_stages = before.get('results', {}).get(corpus)
+        if not old_stages:
+            continue
+        for name, result in stages.items():
+            if name not in old_stages or not old_stages[name]['seconds']:
+                continue
+            change = result['seconds'] / old_stages[name]['seconds'] - 1
+            flag = '🔺' if change > 0.1 else '🔻' if change < -0.1 else '  '
+            print(f"   {flag} {corpus:>6} {name:<26} {old_stages[name]['seconds'] * 1000:10.1f} → "
+                  f"{result['seconds'] * 1000:10.1f} ms  ({change:+.0%})")
+
+
+# =============================================================================
+# Local Server & Watch Mode
+# =============================================================================
+#
+# `serve` keeps one process alive: the Markdown renderer, the post index and
+# the render cache stay warm, posts/, drafts/ and the page sources are polled
+# for changes (debounced, so a burst of saves triggers one incremental
+# build), and the site is served with cache headers that match how each file
+# is named. A small JSON API under /api/ lets local agents post without
+# spawning a process per post.
+
+WATCH_INTERVAL = 0.5  # seconds between polls
+WATCH_DEBOUNCE = 0.3  # quiet time after the last change before rebuilding
+WATCH_DIRS = (POSTS_DIR, Path("drafts"), IMAGES_DIR, FONTS_DIR)
+WATCH_FILES = (LAYOUT_PATH, STYLESHEET_SOURCE, Path("search.js"), Path("sw-register.js"))
+
+# Content-hashed files never change under the same name
+IMMUTABLE_PATH_PATTERN = re.compile(r'^/(assets/site-[0-9a-f]{8}\.css|assets/fonts/[^/]+|images/resized/[^/]+)$')
+
+
+def watch_snapshot() -> dict[str, tuple[int, int]]:
+    """(mtime, size) of every watched file."""
+    snapshot = {}
+    for directory in WATCH_DIRS:
+        if not directory.exists():
+            continue
+        for path in directory.rglob("*"):
+            if path.is_file() and IMAGE_VARIANTS_DIR not in path.parents and not path.name.startswith('.'):
+                stat = path.stat()
+                snapshot[path.as_posix()] = (stat.st_mtime_ns, stat.st_size)
+    for path in WATCH_FILES:
+        if path.exists():
+            stat = path.stat()
+            snapshot[path.as_posix()] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def rebuild_changed(changed: set[str]):
+    """Bring the site up to date after source changes."""
+    if all(path.startswith('drafts/') for path in changed):
+        print(f"📝 {len(changed)} draft(s) changed - publish with 'publish-drafts' or POST /api/drafts/<name>/publish")
+        return
+    print(f"👀 {len(changed)} file(s) changed: {', '.join(sorted(changed)[:3])}{' ...' if len(changed) > 3 else ''}")
+    try:
+        if build_site():
+            generate_rss()
+    except Exception as e:
+        # Keep watching; the next save gets another try
+        print(f"❌ Rebuild failed: {e}")
+
+
+def watch_site(stop: threading.Event = None):
+    """Poll sources and rebuild incrementally until stop is set (or Ctrl-C)."""
+    stop = stop or threading.Event()
+    snapshot = watch_snapshot()
+    while not stop.wait(WATCH_INTERVAL):
+        current = watch_snapshot()
+        if current == snapshot:
+            continue
+        # Debounce: wait until the files stop changing
+        while True:
+            stop.wait(WATCH_DEBOUNCE)
+            settled = watch_snapshot()
+            if settled == current or stop.is_set():
+                break
+            current = settled
+        changed = {path for path in set(snapshot) | set(current) if snapshot.get(path) != current.get(path)}
+        snapshot = current
+        rebuild_changed(changed)
+        # Our own build may have touched watched files (e.g. an imported layout)
+        snapshot = watch_snapshot()
+
+
+def site_request_handler() -> type:
+    """The request handler class (http.server is only imported when serving)."""
+    SimpleHTTPRequestHandler = lazy_import('http.server').SimpleHTTPRequestHandler
+
+    class SiteRequestHandler(SimpleHTTPRequestHandler):
+        """Static files with cache headers, plus the /api/ endpoints."""
+
+        def end_headers(self):
+            if not self.path.startswith('/api/'):
+                if IMMUTABLE_PATH_PATTERN.match(self.path.split('?')[0]) or re.search(r'[?&]v=', self.path):
+                    self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+                else:
+                    # Revalidate with Last-Modified so rebuilt pages show up on reload
+                    self.send_header('Cache-Control', 'no-cache')
+            super().end_headers()
+
+        def send_json(self, status: int, data):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def forbidden_reason(self) -> str | None:
+            """Why a POST may not be served: it must be JSON, sent to this host:port by name, from no other origin.
+
+            Browsers can't send application/json across origins without a
+            preflight (which gets no CORS headers here), and the Host check
+            stops DNS-rebinding pages from posting as 127.0.0.1.
+            """
+            if self.headers.get_content_type() != 'application/json':
+                return "Content-Type must be application/json"
+            host, port = self.server.server_address[:2]
+            hosts = {f"{name}:{port}" for name in (host, 'localhost', '127.0.0.1', '[::1]')}
+            if self.headers.get('Host') not in hosts:
+                return "unexpected Host header"
+            origin = self.headers.get('Origin')
+            if origin is not None:
+                parts = lazy_import('urllib.parse').urlsplit(origin)
+                if parts.scheme != 'http' or parts.netloc not in hosts:
+                    return "cross-origin requests are not allowed"
+            return None
+
+        def read_json(self) -> dict | None:
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                data = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return None
+            return data if isinstance(data, dict) else None
+
+        def do_GET(self):
+            if not self.path.startswith('/api/'):
+                # Only what `build --out` would publish: not manager.py, posts/, drafts/ or .site/
+                parse = lazy_import('urllib.parse')
+                if not is_publishable(parse.unquote(parse.urlsplit(self.path).path)):
+                    return self.send_error(404)
+                return super().do_GET()
+            path = self.path.split('?')[0].rstrip('/')
+            if path == '/api/posts':
+                fields = ('slug', 'title', 'date', 'tags', 'page', 'reading_time', 'excerpt')
+                self.send_json(200, [{key: post.get(key) for key in fields}
+                                     for post in load_post_index()])
+            elif path.startswith('/api/posts/'):
+                post = find_post(lazy_import('urllib.parse').unquote(path[len('/api/posts/'):]))
+                if post is None:
+                    self.send_json(404, {'error': 'post not found'})
+                else:
+                    self.send_json(200, dict(post, html=read_post_html(post)))
+            elif path == '/api/drafts':
+                parse = lazy_import('urllib.parse')
+                query = parse.parse_qs(parse.urlsplit(self.path).query)
+                drafts = scan_drafts(tag=query.get('tag', [None])[0], sort=query.get('sort', ['name'])[0])
+                self.send_json(200, [{key: draft[key] for key in ('name', 'title', 'tags', 'date')} for draft in drafts])
+            else:
+                self.send_json(404, {'error': 'unknown endpoint'})
+
+        def do_POST(self):
+            path = self.path.split('?')[0].rstrip('/')
+            reason = self.forbidden_reason()
+            if reason:
+                return self.send_json(403, {'error': reason})
+            data = self.read_json()
+            if data is None:
+                return self.send_json(400, {'error': 'body must be a JSON object'})
+
+            if path == '/api/posts':
+                title, content = data.get('title'), data.get('content')
+                tags = data.get('tags', [])
+                if isinstance(tags, str):
+                    tags = tags.split(',')
+                if not isinstance(title, str) or not isinstance(content, str) or not title.strip():
+                    return self.send_json(400, {'error': "'title' and 'content' are required strings"})
+                with site_lock():
+                    source = create_post(title, content, [str(t).strip() for t in tags if str(t).strip()])
+                    if source:
+                        generate_rss()
+                if not source:
+                    return self.send_json(500, {'error': 'build failed'})
+                self.send_json(201, find_post(source.stem) or {'slug': source.stem})
+
+            elif re.fullmatch(r'/api/drafts/[^/]+/publish', path):
+                name = lazy_import('urllib.parse').unquote(path.split('/')[3])
+                if '/' in name or name.startswith('.') or not (Path("drafts") / f"{name}.md").exists():
+                    return self.send_json(404, {'error': 'draft not found'})
+                source = publish_draft(name)
+                if not source:
+                    return self.send_json(500, {'error': 'publish failed'})
+                self.send_json(201, find_post(source.stem) or {'slug': source.stem})
+
+            elif path == '/api/build':
+                ok = build_site(force=bool(data.get('force')))
+                self.send_json(200 if ok else 500, {'ok': ok})
+
+            else:
+                self.send_json(404, {'error': 'unknown endpoint'})
+
+        def do_HEAD(self):
+            parse = lazy_import('urllib.parse')
+            if not is_publishable(parse.unquote(parse.urlsplit(self.path).path)):
+                return self.send_error(404)
+            return super().do_HEAD()
+
+        def list_directory(self, path):
+            # Directories without an index.html aren't pages
+            self.send_error(404)
+            return None
+
+        def log_message(self, format, *args):
+            # Only log API calls and errors; page loads would drown the build output
+            if self.path.startswith('/api/') or (len(args) > 1 and str(args[1])[:1] in '45'):
+                super().log_message(format, *args)
+
+    return SiteRequestHandler
+
+
+def serve_site(host: str = "127.0.0.1", port: int = 8000, watch: bool = True) -> bool:
+    """Build once, then serve the site (and rebuild on changes) until Ctrl-C."""
+    if not build_site():
+        return False
+
+    stop = threading.Event()
+    if watch:
+        threading.Thread(target=watch_site, args=(stop,), daemon=True).start()
+
+    try:
+        server = lazy_import('http.server').ThreadingHTTPServer((host, port), site_request_handler())
+    except OSError as e:
+        print(f"❌ Could not listen on {host}:{port}: {e}")
+        return False
+
+    print(f"\n🌐 Serving on http://{host}:{port}/{'  (watching for changes)' if watch else ''}")
+    print("   API: GET /api/posts · GET /api/drafts · POST /api/posts · "
+          "POST /api/drafts/<name>/publish · POST /api/build")
+    print("   Press Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        stop.set()
+        server.server_close()
+    return True
+
+
+# Phase timings for --profile-startup
+PHASE_TIMINGS = {}
+
+
+def print_startup_profile():
+    """Report import and phase timings (for --profile-startup) on stderr."""
+    total = time.perf_counter() - _STARTED
+    lines = ["⏱️  Startup profile:"]
+    lines += [f"   {name:<24} {secs * 1000:7.1f} ms" for name, secs in PHASE_TIMINGS.items()]
+    if IMPORT_TIMINGS:
+        lines.append("   lazy imports (inside the phases above):")
+        lines += [f"     {name:<22} {secs * 1000:7.1f} ms" for name, secs in IMPORT_TIMINGS.items()]
+    lines.append(f"   {'total':<24} {total * 1000:7.1f} ms  (plus interpreter startup)")
+    print('\n'.join(lines), file=sys.stderr)
+
+
+def main():
+    """Entry point: read-only commands without arguments skip argparse."""
+    argv = sys.argv[1:]
+    profile = '--profile-startup' in argv
+    argv = [arg for arg in argv if arg != '--profile-startup']
+    trace_path = os.environ.get(TRACE_ENV)
+    for i, arg in enumerate(argv):
+        if arg == '--trace' and i + 1 < len(argv):
+            trace_path = argv[i + 1]
+            del argv[i:i + 2]
+            break
+        if arg.startswith('--trace='):
+            trace_path = arg.split('=', 1)[1]
+            del argv[i]
+            break
+    if trace_path:
+        start_tracing()
+    PHASE_TIMINGS['module imports'] = time.perf_counter() - _STARTED
+
+    fast_commands = {'list': list_posts, 'drafts': list_drafts, 'ready': bd_list_ready}
+    try:
+        if len(argv) == 1 and argv[0] in fast_commands:
+            if sys.stdout.isatty():
+                print_banner()
+            started = time.perf_counter()
+            fast_commands[argv[0]]()
+            PHASE_TIMINGS['command'] = time.perf_counter() - started
+        else:
+            run_cli(argv)
+    finally:
+        if trace_path:
+            write_trace(Path(trace_path))
+        if profile:
+            print_startup_profile()
+
+
+def run_cli(argv: list[str]):
+    """Parse the full command line and run the command."""
+    started = time.perf_counter()
+    argparse = lazy_import('argparse')
+    parser = argparse.ArgumentParser(
+        description="WF-AI Site Manager - Manage your static AI blog",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python manager.py post "My Title" "My **markdown** content" --tags ai,local
+  python manager.py build
+  python manager.py rss
+  python manager.py list
+        """
+    )
+    
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk render cache')
+    parser.add_argument('--profile-startup', action='store_true', help='Report import and phase timings on stderr')
+    parser.add_argument('--trace', metavar='FILE',
+                        help=f'Write per-stage spans to FILE (.json: Chrome trace, else JSON lines); or set {TRACE_ENV}')
+
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+    
+    # Post command
+    post_parser = subparsers.add_parser('post', help='Create a new post')
+    post_parser.add_argument('title', help='Post title')
+    post_parser.add_argument('content', help='Post content (Markdown supported)')
+    post_parser.add_argument('--tags', '-t', help='Comma-separated tags', default='')
+    
+    # RSS command
+    subparsers.add_parser('rss', help='Regenerate RSS, Atom and per-tag feeds')
+
+    # Render cache command
+    cache_parser = subparsers.add_parser('cache', help='Show or prune the render cache')
+    cache_parser.add_argument('action', choices=['stats', 'prune'], help='stats: show usage, prune: evict LRU entries')
+    cache_parser.add_argument('--max-mb', type=float, default=None, help='Prune down to this size (default: cache limit)')
+    cache_parser.add_argument('--all', action='store_true', help='Prune every entry')
+
+    # Stylesheet command
+    subparsers.add_parser('css', help='Compile site.css and the used Tailwind utilities into assets/')
+
+    # Fonts command
+    fonts_parser = subparsers.add_parser('fonts', help='Show vendored fonts and their subsets')
+    fonts_parser.add_argument('--fetch', action='store_true', help='Download the fonts into fonts/ first')
+
+    # Search command
+    subparsers.add_parser('search', help='Rebuild the client-side search index and show its size budget')
+
+    # Index command
+    subparsers.add_parser('reindex', help='Rebuild the post index from posts/')
+
+    # Build command
+    build_parser = subparsers.add_parser('build', help='Rebuild index.html from posts/ (only changed posts are re-rendered)')
+    build_parser.add_argument('--force', action='store_true', help='Re-render every post, ignoring the manifest')
+    build_parser.add_argument('--jobs', '-j', type=int, default=1, help='Render in N worker processes (0 = one per CPU)')
+    build_parser.add_argument('--out', metavar='DIR',
+                              help='Also export publishable files (+ .gz/.zst) to DIR, e.g. dist')
+
+    # List command
+    subparsers.add_parser('list', help='List recent posts')
+
+    # Serve / watch commands
+    serve_parser = subparsers.add_parser('serve', help='Serve the site locally, rebuild on changes, JSON API under /api/')
+    serve_parser.add_argument('--port', type=int, default=8000, help='Port (default: 8000)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Interface (default: 127.0.0.1)')
+    serve_parser.add_argument('--no-watch', action='store_true', help="Don't rebuild when sources change")
+    subparsers.add_parser('watch', help='Rebuild whenever posts/ or the page sources change')
+
+    # Benchmark command
+    bench_parser = subparsers.add_parser('bench', help='Time every publish stage on synthetic 10/1k/10k-post sites')
+    bench_parser.add_argument('--sizes', default=','.join(map(str, BENCH_SIZES)),
+                              help='Comma-separated corpus sizes (default: 10,1000,10000)')
+    bench_parser.add_argument('--output', '-o', type=Path, help='JSON results file (default: .site/bench/bench-<time>.json)')
+    bench_parser.add_argument('--compare', type=Path, help='Earlier results file to compare against')
+    bench_parser.add_argument('--jobs', '-j', type=int, default=1, help='Render in N worker processes (0 = one per CPU)')
+    bench_parser.add_argument('--trace-memory', action='store_true',
+                              help='Also record peak Python allocations per stage (slower)')
+
+    # BEADS integration commands
+    idea_parser = subparsers.add_parser('idea', help='Create a post idea (bd task)')
+    idea_parser.add_argument('title', help='Post idea/topic')
+    idea_parser.add_argument('--priority', '-p', type=int, default=2, help='Priority 0-4 (default: 2)')
+
+    subparsers.add_parser('ready', help='List ready post ideas from bd')
+    subparsers.add_parser('publish', help='Interactive: pick task, write post, close task')
+
+    # Drafts workflow commands (NEW!)
+    drafts_parser = subparsers.add_parser('drafts', help='List drafts in drafts/ folder')
+    drafts_parser.add_argument('pattern', nargs='?', help="Glob of draft names, e.g. 'llm-*'")
+    drafts_parser.add_argument('--tag', '-t', help='Only drafts with this tag')
+    drafts_parser.add_argument('--sort', choices=DRAFT_SORT_KEYS, default='name', help='Sort order (date: newest first)')
+    publish_draft_parser = subparsers.add_parser('publish-draft', help='Publish a draft from drafts/')
+    publish_draft_parser.add_argument('name', help='Draft filename (without .md)')
+    publish_drafts_parser = subparsers.add_parser('publish-drafts', help='Publish many drafts with a single build')
+    publish_drafts_parser.add_argument('pattern', nargs='?', help="Glob of draft names, e.g. 'llm-*'")
+    publish_drafts_parser.add_argument('--all', action='store_true', help='Publish every draft in drafts/')
+    publish_drafts_parser.add_argument('--tag', '-t', help='Only drafts with this tag')
+    publish_drafts_parser.add_argument('--dry-run', action='store_true', help='Show what would be published')
+    publish_drafts_parser.add_argument('--jobs', '-j', type=int, default=1, help='Render in N worker processes (0 = one per CPU)')
+    
+    # Parse args
+    args = parser.parse_args(argv)
+    PHASE_TIMINGS['argparse'] = time.perf_counter() - started
+    started = time.perf_counter()
+
+    # The banner is for people; agents piping the output don't need it
+    if sys.stdout.isatty():
+        print_banner()
+
+    if args.no_cache:
+        global RENDER_CACHE_ENABLED
+        RENDER_CACHE_ENABLED = False
+    
+    if not HAS_MARKDOWN:
+        print("⚠️  Warning: 'markdown' library not found. Posts will be plain text.")
+        print("   Install with: pip install markdown\n")
+    
+    if args.command == 'post':
+        tags = [t.strip() for t in args.tags.split(',') if t.strip()] if args.tags else []
+        success = create_post(args.title, args.content, tags)
+        if success:
+            print("\n💡 Tip: Run 'python manager.py rss' to update your RSS feed")
+            print("   Then: git add . && git commit -m 'new post' && git push")
+    
+    elif args.command == 'rss':
+        generate_rss()
+
+    elif args.command == 'build':
+        if build_site(force=args.force, jobs=args.jobs or os.cpu_count() or 1) and args.out:
+            generate_rss()
+            export_dist(Path(args.out))
+
+    elif args.command == 'reindex':
+        reindex()
+
+    elif args.command == 'search':
+        rebuild_search_index()
+
+    elif args.command == 'css':
+        rebuild_stylesheet()
+
+    elif args.command == 'fonts':
+        if not args.fetch or fetch_fonts():
+            font_status()
+
+    elif args.command == 'cache':
+        if args.action == 'stats':
+            render_cache_stats()
+        else:
+            limit = 0 if args.all else RENDER_CACHE_MAX_BYTES
+            if args.max_mb is not None:
+                limit = int(args.max_mb * 1024 * 1024)
+            removed, freed = prune_render_cache(limit)
+            print(f"🧹 Pruned {removed} render cache entr{'y' if removed == 1 else 'ies'} ({freed / 1024:.1f} KB)")
+    
+    elif args.command == 'list':
+        list_posts()
+
+    elif args.command == 'serve':
+        serve_site(args.host, args.port, watch=not args.no_watch)
+
+    elif args.command == 'bench':
+        run_benchmarks([int(s) for s in args.sizes.split(',') if s.strip()], args.output, args.compare,
+                       jobs=args.jobs or os.cpu_count() or 1, trace_memory=args.trace_memory)
+
+    elif args.command == 'watch':
+        if build_site():
+            print(f"👀 Watching {', '.join(p.as_posix() + '/' for p in WATCH_DIRS)} and the page sources "
+                  "(Ctrl-C to stop)")
+            try:
+                watch_site()
+            except KeyboardInterrupt:
+                print("\n👋 Stopped")
+
+    elif args.command == 'idea':
+        task_id = bd_create_post_task(args.title, args.priority)
+        if task_id:
+            print(f"✅ Post idea created: {task_id}")
+            print(f"   '{args.title}' (priority {args.priority})")
+            print("\n💡 When ready to write: python manager.py publish")
+
+    elif args.command == 'ready':
+        bd_list_ready()
+
+    elif args.command == 'publish':
+        bd_publish_flow()
+
+    elif args.command == 'drafts':
+        list_drafts(args.pattern, args.tag, args.sort)
+
+    elif args.command == 'publish-draft':
+        publish_draft(args.name)
+
+    elif args.command == 'publish-drafts':
+        if not args.pattern and not args.all and not args.tag:
+            print("❌ Give a draft name pattern, --tag or --all")
+        else:
+            publish_drafts(None if args.all else args.pattern, dry_run=args.dry_run,
+                           jobs=args.jobs or os.cpu_count() or 1, tag=args.tag)
+
+    else:
+        # Legacy mode: support old "python manager.py 'Title' 'Content'" syntax
+        if len(argv) >= 2:
+            title = argv[0]
+            content = argv[1]
+            tags = argv[2].split(',') if len(argv) > 2 else []
+            success = create_post(title, content, tags)
+            if success:
+                print("\n💡 Tip: Run 'python manager.py rss' to update your RSS feed")
+        else:
+            parser.print_help()
+            print("\n" + "="*50)
+            print("Quick start:")
+            print('  python manager.py post "Hello World" "My first post!"')
+
+    PHASE_TIMINGS['command'] = time.perf_counter() - started
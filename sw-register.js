@@ -0,0 +1,7 @@
+// Registers the service worker `manager.py build` writes next to this file (sw.js)
+if ('serviceWorker' in navigator) {
+    const root = new URL('.', document.currentScript.src);
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register(new URL('sw.js', root), { scope: root.pathname }).catch(() => {});
+    });
+}
@@ -0,0 +1,99 @@
+"""bd integration against a fake `bd` (selected with BD_BIN)."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SITE_FILES = ("index.html", "layout.html", "site.css", "search.js", "sw-register.js", "feed.xsl")
+
+# Logs its argv to bd-calls.jsonl and answers like `bd --json`
+FAKE_BD = f"""#!{sys.executable}
+import json, sys
+with open({{log!r}}, 'a') as f:
+    f.write(json.dumps(sys.argv[1:]) + '\\n')
+print(json.dumps({{{{'id': 'fake-1'}}}} if 'create' in sys.argv else []))
+"""
+
+
+class FakeBdTest(unittest.TestCase):
+    def setUp(self):
+        self.site = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.site)
+        for name in SITE_FILES:
+            if (ROOT / name).exists():
+                shutil.copy(ROOT / name, self.site / name)
+        self.log = self.site / "bd-calls.jsonl"
+        self.bd = self.site / "fake-bd"
+        self.bd.write_text(FAKE_BD.format(log=str(self.log)))
+        self.bd.chmod(0o755)
+        (self.site / ".beads").mkdir()
+        (self.site / "drafts").mkdir()
+
+    def manager(self, *args, bd=None):
+        env = dict(os.environ, BD_BIN=str(bd or self.bd))
+        return subprocess.run([sys.executable, str(ROOT / "manager.py"), *args], cwd=self.site,
+                              env=env, capture_output=True, text=True, timeout=120)
+
+    def calls(self):
+        if not self.log.exists():
+            return []
+        return [json.loads(line) for line in self.log.read_text().splitlines()]
+
+    def write_tasks(self, *tasks):
+        with open(self.site / ".beads" / "issues.jsonl", "w") as f:
+            for task in tasks:
+                f.write(json.dumps(task) + "\n")
+
+    def test_idea_creates_task_with_bd_bin(self):
+        result = self.manager("idea", "Fake bd post")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        [call] = self.calls()
+        self.assertEqual(call[0], "create")
+        self.assertIn("Write post: Fake bd post", call)
+
+    def test_publish_drafts_closes_tasks_in_one_call(self):
+        self.write_tasks(
+            {"id": "t-alpha", "title": "Write post: Alpha", "status": "open"},
+            {"id": "t-other", "title": "Write post: Something else", "status": "open"},
+        )
+        (self.site / "drafts" / "alpha.md").write_text("---\ntitle: Alpha\n---\nFirst post.\n")
+        (self.site / "drafts" / "beta.md").write_text("---\ntitle: Beta\ntask: t-beta\n---\nSecond post.\n")
+
+        result = self.manager("publish-drafts", "--all")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        closes = [call for call in self.calls() if call[0] == "close"]
+        self.assertEqual(len(closes), 1, self.calls())
+        self.assertEqual(sorted(closes[0][1:3]), ["t-alpha", "t-beta"])
+
+    def test_publish_drafts_without_beads_runs_no_bd(self):
+        (self.site / ".beads").rmdir()
+        (self.site / "drafts" / "alpha.md").write_text("---\ntitle: Alpha\n---\nFirst post.\n")
+        result = self.manager("publish-drafts", "--all")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertEqual(self.calls(), [])
+
+    def test_failed_bd_is_reported(self):
+        self.write_tasks({"id": "t-alpha", "title": "Write post: Alpha", "status": "open"})
+        (self.site / "drafts" / "alpha.md").write_text("---\ntitle: Alpha\n---\nFirst post.\n")
+        result = self.manager("publish-drafts", "--all", bd=shutil.which("false"))
+        self.assertIn("close t-alpha", result.stdout)
+        self.assertIn("failed (exit 1)", result.stdout)
+
+    def test_malformed_issue_lines_are_skipped(self):
+        self.write_tasks({"id": "t-alpha", "title": "Write post: Alpha", "status": "open"})
+        with open(self.site / ".beads" / "issues.jsonl", "a") as f:
+            f.write('{"id": "t-half", "title": "Wri\n')
+        result = self.manager("ready")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("Skipping malformed line 2", result.stdout)
+        self.assertIn("Alpha", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
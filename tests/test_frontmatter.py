@@ -0,0 +1,71 @@
+"""The typed frontmatter parser (the YAML subset posts and drafts use)."""
+
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import sitekit  # noqa: E402
+
+# (frontmatter lines, key, expected value)
+CASES = [
+    # STRING_KEYS keep plain scalars as written
+    ("title: 3.10 release", "title", "3.10 release"),
+    ("title: 2024", "title", "2024"),
+    ("guid: 12345", "guid", "12345"),
+    ("title: true", "title", "true"),
+    ('title: "Rust: the good parts"', "title", "Rust: the good parts"),
+    ("title: 'It''s: quoted'", "title", "It's: quoted"),
+    ('title: "Say \\"hi\\""', "title", 'Say "hi"'),
+    # Other keys are typed
+    ("draft: true", "draft", True),
+    ("featured: False", "featured", False),
+    ("weight: 3", "weight", 3),
+    ("ratio: 0.5", "ratio", 0.5),
+    ("series: ~", "series", None),
+    ("series: main # trailing comment", "series", "main"),
+    # Tags: flow lists, comma strings (quote-aware) and block lists
+    ('tags: [ai, "local-first"]', "tags", ["ai", "local-first"]),
+    ('tags: [ai, "ml, nlp"]', "tags", ["ai", "ml, nlp"]),
+    ('tags: ai, "ml, nlp"', "tags", ["ai", "ml, nlp"]),
+    ("tags: ai, ,#python", "tags", ["ai", "python"]),
+    ("tags: ai # python", "tags", ["ai"]),
+    ('tags:\n  - ai\n  - "#ml"', "tags", ["ai", "ml"]),
+    ("tags: []", "tags", []),
+    ("tags: 2024", "tags", ["2024"]),
+    # Block scalars
+    ("excerpt: |\n  # Heading\n\n  Body line", "excerpt", "# Heading\n\nBody line"),
+    ("excerpt: >\n  one\n  two\n\n  three", "excerpt", "one two\nthree"),
+    # Plain continuation lines fold into the value
+    ("description: first\n  second", "description", "first second"),
+]
+
+
+class ParseFrontmatterTest(unittest.TestCase):
+    def parse(self, text):
+        return sitekit.parse_frontmatter_lines(text.splitlines(keepends=True))
+
+    def test_values(self):
+        for text, key, expected in CASES:
+            with self.subTest(text=text):
+                value = self.parse(text)[key]
+                self.assertEqual(value, expected)
+                self.assertIs(type(value), type(expected))
+
+    def test_comment_lines_are_ignored(self):
+        self.assertEqual(self.parse("# a comment\ntitle: Hello\n  # indented comment\ndraft: false\n"),
+                         {"title": "Hello", "draft": False})
+
+    def test_parse_frontmatter_splits_body(self):
+        frontmatter, body = sitekit.parse_frontmatter("---\ntitle: Hi\ntags: a, b\n---\n\nBody text\n")
+        self.assertEqual(frontmatter, {"title": "Hi", "tags": ["a", "b"]})
+        self.assertEqual(body, "Body text")
+
+    def test_missing_frontmatter(self):
+        self.assertEqual(sitekit.parse_frontmatter("No frontmatter\n"), ({}, "No frontmatter\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Incremental related-posts updates agree with a full recompute."""
+
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import sitekit  # noqa: E402
+
+VOCABULARY = [f"term{i}" for i in range(60)]
+
+
+@unittest.skipUnless(sitekit.HAS_NUMPY, "numpy is not installed")
+class IncrementalRelatedTest(unittest.TestCase):
+    def setUp(self):
+        self.site = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.site)
+        self.random = random.Random(7)
+        self.docs, self.hashes = {}, {}
+        for i in range(40):
+            self.write_doc(f"posts/post-{i:02}.md")
+
+    def write_doc(self, source):
+        terms = self.random.sample(VOCABULARY, 12)
+        self.docs[source] = {'terms': {term: self.random.randint(1, 5) for term in terms}}
+        self.hashes[source] = f"{source}-{self.random.random()}"
+
+    def build(self, force=False):
+        ordered = [{'source': source, 'hash': self.hashes[source]} for source in sorted(self.docs)]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            related, _ = sitekit.build_related(ordered, self.docs, force)
+        return related, output.getvalue()
+
+    def recompute(self):
+        """Every row scored from scratch with the IDF weights in the saved state."""
+        state = json.loads(sitekit.RELATED_PATH.read_text())
+        sources = sorted(self.docs)
+        vectors = sitekit.related_vectors(sources, self.docs, state['idf'])
+        rows = list(range(len(sources)))
+        return dict(zip(sources, sitekit.top_related(vectors @ vectors.T, sources, rows)))
+
+    def test_incremental_matches_full(self):
+        _, output = self.build()
+        self.assertIn("(full", output)
+
+        for _ in range(5):
+            # Edit two posts, remove one and add one: within the IDF drift, so incremental
+            for source in self.random.sample(sorted(self.docs), 2):
+                self.write_doc(source)
+            removed = self.random.choice(sorted(self.docs))
+            del self.docs[removed], self.hashes[removed]
+            self.write_doc(f"posts/new-{self.random.randrange(10 ** 6)}.md")
+
+            related, output = self.build()
+            self.assertNotIn("(full", output)
+            self.assertEqual(related, self.recompute())
+
+    def test_no_changes_returns_stored_lists(self):
+        first, _ = self.build()
+        again, output = self.build()
+        self.assertEqual(output, "")
+        self.assertEqual(again, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""The build-time stylesheet compiler keeps exactly the utilities the site uses."""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SITE_FILES = ("layout.html", "site.css", "search.js", "sw-register.js", "feed.xsl")
+
+POST = """---
+title: Margins
+date: 2026-01-02
+---
+Hello.
+
+<div class="mt-7 ml-5">Spaced</div>
+"""
+
+
+class StylesheetTest(unittest.TestCase):
+    def setUp(self):
+        self.site = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.site)
+        for name in SITE_FILES:
+            shutil.copy(ROOT / name, self.site / name)
+        (self.site / "posts").mkdir()
+        (self.site / "posts" / "margins.md").write_text(POST)
+
+    def build(self, *args):
+        result = subprocess.run([sys.executable, str(ROOT / "manager.py"), *args], cwd=self.site,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        [css] = (self.site / "assets").glob("site-*.css")
+        return css.read_text()
+
+    def test_used_utilities_are_compiled(self):
+        css = self.build("build")
+        # From layout.html
+        for rule in (".max-w-2xl{", ".w-3{", ".bg-accent{", ".animate-pulse-glow{"):
+            self.assertIn(rule, css)
+        # From the post body only
+        for rule in (".mt-7{margin-top:1.75rem}", ".ml-5{margin-left:1.25rem}"):
+            self.assertIn(rule, css)
+
+    def test_unused_utilities_are_dropped(self):
+        css = self.build("build")
+        for rule in (".mt-9{", ".ml-7{", ".pb-12{"):
+            self.assertNotIn(rule, css)
+
+    def test_css_command_keeps_post_utilities(self):
+        self.build("build")
+        css = self.build("css")
+        self.assertIn(".mt-7{", css)
+
+
+if __name__ == "__main__":
+    unittest.main()